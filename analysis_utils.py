@@ -0,0 +1,498 @@
+"""Source analysis utilities for Video Clipper pipeline.
+
+One-time, per-source analyses that cutting reuses: the reframing track for
+vertical 9:16 crops, the speaker → position map, the scene-cut index and
+the audio envelope / silence map. Each analysis streams the source through
+ffmpeg once at low resolution (or low sample rate), reduces it with NumPy
+and caches the result as JSON in the video's work dir, keyed by the
+source's name, size and mtime.
+
+OpenCV is optional — with it the reframing track follows faces (Haar
+cascade), without it a motion/edge saliency profile is used.
+"""
+import bisect
+import json
+import os
+import subprocess
+
+import numpy as np
+
+
+# ── Cache Helpers ─────────────────────────────────────────────────────────
+
+def _source_stamp(video_path):
+    """Identity of a source file for cache invalidation."""
+    st = os.stat(video_path)
+    return {"source": os.path.basename(video_path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+def _load_cached(cache_path, video_path):
+    """Return the cached analysis dict if it belongs to this exact source, else None."""
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path) as f:
+        data = json.load(f)
+    stamp = _source_stamp(video_path)
+    if all(data.get(k) == v for k, v in stamp.items()):
+        return data
+    return None
+
+
+def _save_cached(cache_path, video_path, data):
+    """Write an analysis result stamped with its source identity."""
+    with open(cache_path, "w") as f:
+        json.dump(dict(data, **_source_stamp(video_path)), f)
+
+
+# ── Frame Sampling ────────────────────────────────────────────────────────
+
+def sample_frames(video_path, fps, width, height):
+    """Yield grayscale frames (uint8 arrays, height × width) at a low rate.
+
+    One sequential ffmpeg decode piped as raw video — nothing is written
+    to disk. height must match the source aspect (even number). fps None
+    keeps every source frame.
+    """
+    vf = f"scale={width}:{height},format=gray"
+    if fps:
+        vf = f"fps={fps}," + vf
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", video_path,
+        "-vf", vf, "-f", "rawvideo", "pipe:1",
+    ]
+    frame_size = width * height
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            buf = proc.stdout.read(frame_size)
+            if len(buf) < frame_size:
+                break
+            yield np.frombuffer(buf, dtype=np.uint8).reshape(height, width)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+# ── Reframing Track ───────────────────────────────────────────────────────
+# Horizontal focus position (0–1 of frame width) per second of source,
+# used to steer the 9:16 crop of vertical cuts.
+
+_REFRAME_WIDTH = 320  # analysis resolution — enough for Haar faces
+_REFRAME_MEDIAN = 5  # seconds — median window against detection flicker
+_REFRAME_DEADZONE = 0.03  # ignore focus moves smaller than this (fraction of width)
+_REFRAME_MAX_PAN = 0.08  # max crop movement per second (fraction of width)
+
+
+def _face_cascade():
+    """Return an OpenCV Haar face cascade, or None if OpenCV isn't installed."""
+    try:
+        import cv2
+    except ImportError:
+        return None
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    return None if cascade.empty() else cascade
+
+
+def _frame_focus(frame, prev, cascade):
+    """Horizontal focus of one frame (0–1), or None if nothing stands out.
+
+    Largest detected face wins; otherwise the centroid of a per-column
+    saliency profile (edge energy plus motion against the previous sample).
+    """
+    width = frame.shape[1]
+    if cascade is not None:
+        faces = cascade.detectMultiScale(frame, scaleFactor=1.2, minNeighbors=4, minSize=(16, 16))
+        if len(faces):
+            x, _, w, _ = max(faces, key=lambda f: f[2] * f[3])
+            return (x + w / 2) / width
+
+    f = frame.astype(np.float32)
+    energy = np.zeros(width, dtype=np.float32)
+    energy[1:] = np.abs(np.diff(f, axis=1)).sum(axis=0)
+    if prev is not None:
+        energy += 2 * np.abs(f - prev).sum(axis=0)
+    total = energy.sum()
+    if total <= 0:
+        return None
+    return float((energy * (np.arange(width) + 0.5)).sum() / total / width)
+
+
+def _smooth_track(raw):
+    """Turn noisy per-second focus points into a steady crop path.
+
+    Gaps are filled from the previous point (center at the start), a
+    median filter removes one-off detections, then the path only moves when
+    focus leaves a dead zone and never faster than _REFRAME_MAX_PAN.
+    """
+    filled = np.empty(len(raw), dtype=np.float64)
+    last = 0.5
+    for i, x in enumerate(raw):
+        last = x if x is not None else last
+        filled[i] = last
+
+    half = _REFRAME_MEDIAN // 2
+    padded = np.pad(filled, half, mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, _REFRAME_MEDIAN)
+    target = np.median(windows, axis=1)
+
+    path = np.empty_like(target)
+    pos = target[0] if len(target) else 0.5
+    for i, t in enumerate(target):
+        delta = t - pos
+        if abs(delta) > _REFRAME_DEADZONE:
+            pos += float(np.clip(delta, -_REFRAME_MAX_PAN, _REFRAME_MAX_PAN))
+        path[i] = pos
+    return path
+
+
+def load_reframe_track(work_dir, video_path, src_width, src_height):
+    """Load the per-second reframing track for a source, analysing it on first use.
+
+    Cached as reframe_track.json in the work dir. Returns a list of focus
+    positions (0–1 of frame width), one per second of source.
+    """
+    cache_path = os.path.join(work_dir, "reframe_track.json")
+    cached = _load_cached(cache_path, video_path)
+    if cached:
+        return cached["track"]
+
+    height = max(2, int(round(_REFRAME_WIDTH * src_height / src_width / 2)) * 2)
+    cascade = _face_cascade()
+    method = "faces" if cascade is not None else "saliency"
+    print(f"  Analysing reframing track ({method}, 1 fps @ {_REFRAME_WIDTH}px, once per source)...")
+
+    raw, prev = [], None
+    for frame in sample_frames(video_path, 1, _REFRAME_WIDTH, height):
+        raw.append(_frame_focus(frame, prev, cascade))
+        prev = frame.astype(np.float32)
+
+    track = [round(float(x), 4) for x in _smooth_track(raw)] if raw else []
+    _save_cached(cache_path, video_path, {"method": method, "fps": 1, "track": track})
+    print(f"  Reframing track: {len(track)}s")
+    return track
+
+
+def crop_moves(track, start, end, src_width, src_height):
+    """Crop positions steering a 9:16 crop along the track for [start, end).
+
+    Times are relative to the clip (the cut graph resets timestamps to 0).
+    Returns (initial crop x, [(clip time, crop x), ...]) — the list only
+    holds actual moves and is empty when the crop never moves.
+    """
+    crop_w = src_height * 9 / 16
+    max_x = max(0, src_width - crop_w)
+
+    def _x(sec):
+        focus = track[min(max(int(sec), 0), len(track) - 1)]
+        return int(min(max(focus * src_width - crop_w / 2, 0), max_x))
+
+    x0 = _x(start)
+    moves, last = [], x0
+    sec = int(start) + 1
+    while sec < end:
+        x = _x(sec)
+        if x != last:
+            moves.append((round(sec - start, 3), x))
+            last = x
+        sec += 1
+    return x0, moves
+
+
+# ── Speaker Positions ─────────────────────────────────────────────────────
+# In single wide-shot podcasts (everyone in one frame) each diarized
+# speaker sits at a fixed horizontal position. It is estimated once per
+# source from the reframing track and cached in speaker_map.json, which can
+# be hand-edited if the estimate is off.
+
+_SPEAKER_MIN_SPREAD = 0.15  # positions closer than this are treated as collapsed
+_SPEAKER_MIN_TURN = 1.0  # seconds — shorter utterances don't move the crop
+
+
+def _estimate_speaker_positions(track, utterances):
+    """Median focus position of the track while each speaker talks.
+
+    If the estimates collapse onto one spot (e.g. the face detector always
+    picks the same person), speakers are spread evenly across the frame in
+    order of their estimates instead.
+    """
+    samples = {}
+    for u in utterances:
+        secs = range(int(u["start"]), min(int(u["end"]) + 1, len(track)))
+        samples.setdefault(u["speaker"], []).extend(track[s] for s in secs)
+
+    positions = {spk: float(np.median(vals)) for spk, vals in samples.items() if vals}
+    if len(positions) > 1:
+        ordered = sorted(positions, key=positions.get)
+        spread = positions[ordered[-1]] - positions[ordered[0]]
+        if spread < _SPEAKER_MIN_SPREAD:
+            n = len(ordered)
+            positions = {spk: (i + 0.5) / n for i, spk in enumerate(ordered)}
+    return {spk: round(x, 4) for spk, x in positions.items()}
+
+
+def load_speaker_positions(work_dir, video_path, track, utterances):
+    """Load the speaker → horizontal position map (0–1), estimating it on first use."""
+    cache_path = os.path.join(work_dir, "speaker_map.json")
+    cached = _load_cached(cache_path, video_path)
+    if cached:
+        return cached["positions"]
+
+    positions = _estimate_speaker_positions(track, utterances)
+    _save_cached(cache_path, video_path, {"positions": positions})
+    print("  Speaker positions: " + ", ".join(f"{spk}={x:.2f}" for spk, x in sorted(positions.items()))
+          + f" (edit {os.path.basename(cache_path)} to correct)")
+    return positions
+
+
+def speaker_crop_moves(utterances, positions, start, end, src_width, src_height):
+    """Crop positions that cut to whoever is speaking during [start, end).
+
+    Switches happen at utterance starts (clip-relative seconds); turns
+    shorter than _SPEAKER_MIN_TURN and unknown speakers keep the current
+    framing. Same return shape as crop_moves.
+    """
+    crop_w = src_height * 9 / 16
+    max_x = max(0, src_width - crop_w)
+
+    def _x(focus):
+        return int(min(max(focus * src_width - crop_w / 2, 0), max_x))
+
+    turns = [u for u in utterances
+             if u["end"] > start and u["start"] < end and u["speaker"] in positions]
+    if not turns:
+        return _x(0.5), []
+
+    x0 = _x(positions[turns[0]["speaker"]])
+    moves, last = [], x0
+    for u in turns[1:]:
+        if u["end"] - u["start"] < _SPEAKER_MIN_TURN:
+            continue
+        x = _x(positions[u["speaker"]])
+        if x != last:
+            moves.append((round(max(u["start"] - start, 0), 3), x))
+            last = x
+    return x0, moves
+
+
+# ── Scene-Cut Index ───────────────────────────────────────────────────────
+# Times of hard camera switches, found from the mean absolute difference of
+# consecutive tiny grayscale frames. Every frame is decoded once (it has to
+# be, to place cuts to the frame) but at 64 px wide and in batches, so the
+# NumPy side is negligible next to the decode.
+
+_SCENE_WIDTH = 64
+_SCENE_BATCH = 512  # frames per vectorized diff
+_SCENE_MIN_DIFF = 25.0  # mean abs luma difference (0–255) for a hard cut
+_SCENE_CONTRAST = 3.0  # ...and at least this many times the local median
+
+
+def _detect_cuts(scores, fps):
+    """Frame indices where the difference spikes above its local level."""
+    if len(scores) < 3:
+        return []
+    window = max(3, int(fps) | 1)  # ~1 s, odd
+    padded = np.pad(scores, window // 2, mode="edge")
+    local = np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+    hits = (scores > _SCENE_MIN_DIFF) & (scores > _SCENE_CONTRAST * np.maximum(local, 1.0))
+    # scores[i] compares frame i with frame i+1 — the new shot starts at i+1
+    return (np.flatnonzero(hits) + 1).tolist()
+
+
+def load_scene_index(work_dir, video_path, fps, src_width, src_height):
+    """Load the scene-cut times (seconds) of a source, building them on first use.
+
+    One streaming pass over every frame; cached as scene_index.json in the
+    work dir. fps is the source frame rate (frame index → time).
+    """
+    cache_path = os.path.join(work_dir, "scene_index.json")
+    cached = _load_cached(cache_path, video_path)
+    if cached:
+        return cached["cuts"]
+
+    height = max(2, int(round(_SCENE_WIDTH * src_height / src_width / 2)) * 2)
+    print(f"  Indexing scene cuts (every frame @ {_SCENE_WIDTH}px, once per source)...")
+
+    scores, batch, prev = [], [], None
+    for frame in sample_frames(video_path, None, _SCENE_WIDTH, height):
+        batch.append(frame)
+        if len(batch) == _SCENE_BATCH:
+            prev = _batch_diffs(batch, prev, scores)
+            batch = []
+    if batch:
+        _batch_diffs(batch, prev, scores)
+
+    scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+    cuts = [round(i / fps, 4) for i in _detect_cuts(scores, fps)]
+    _save_cached(cache_path, video_path, {"fps": fps, "cuts": cuts})
+    print(f"  Scene index: {len(cuts)} cuts")
+    return cuts
+
+
+def _batch_diffs(batch, prev, scores):
+    """Append mean abs differences for a batch of frames; returns its last frame."""
+    stack = np.stack(batch).astype(np.int16)
+    if prev is not None:
+        stack = np.concatenate([prev[None], stack])
+    scores.append(np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2)).astype(np.float32))
+    return stack[-1]
+
+
+def snap_to_scene(t, cuts, tolerance):
+    """Move t onto the nearest scene cut within tolerance seconds (else unchanged)."""
+    i = bisect.bisect_left(cuts, t)
+    nearest = [c for c in cuts[max(0, i - 1):i + 1] if abs(c - t) <= tolerance]
+    if not nearest:
+        return t
+    return min(nearest, key=lambda c: abs(c - t))
+
+
+# ── Audio Envelope & Silence Map ──────────────────────────────────────────
+# Loudness per 100 ms of source (RMS in dBFS after a 100 Hz high-pass —
+# close to an ungated LUFS reading for speech) and the silent stretches
+# between speech. Decoded once to 8 kHz mono PCM.
+
+_ENVELOPE_RATE = 8000  # Hz
+_ENVELOPE_HOP = 0.1  # seconds per envelope value
+_ENVELOPE_CHUNK = 600  # hops per read (1 minute)
+_SILENCE_FLOOR_PCT = 5  # percentile taken as the noise floor
+_SILENCE_ABOVE_FLOOR = 10.0  # dB above the floor that still counts as silence
+_SILENCE_DB_RANGE = (-55.0, -30.0)  # clamp for the silence threshold
+_SILENCE_MIN = 0.3  # seconds — shorter dips are just gaps between words
+
+
+def _silences(db, threshold):
+    """[[start, end], ...] seconds where db stays below threshold for _SILENCE_MIN."""
+    quiet = np.concatenate([[False], db < threshold, [False]])
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    runs = edges.reshape(-1, 2) * _ENVELOPE_HOP
+    runs = runs[runs[:, 1] - runs[:, 0] >= _SILENCE_MIN - 1e-9]
+    return [[round(float(s), 2), round(float(e), 2)] for s, e in runs]
+
+
+def load_audio_envelope(work_dir, video_path, audio_path=None):
+    """Load the source's loudness envelope + silence map, building it on first use.
+
+    Decodes audio_path (the MP3 step_transcribe extracts) when given and
+    present, else the source itself — one streaming pass, reduced in NumPy
+    a minute at a time. Cached as audio_envelope.json in the work dir.
+    Returns {"hop", "db": [...], "threshold", "silences": [[start, end], ...]}.
+    """
+    cache_path = os.path.join(work_dir, "audio_envelope.json")
+    cached = _load_cached(cache_path, video_path)
+    if cached:
+        return cached
+
+    src = audio_path if audio_path and os.path.exists(audio_path) else video_path
+    print(f"  Measuring audio envelope ({os.path.basename(src)}, once per source)...")
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", src, "-vn",
+        "-af", "highpass=f=100", "-ac", "1", "-ar", str(_ENVELOPE_RATE),
+        "-f", "s16le", "pipe:1",
+    ]
+    hop = int(_ENVELOPE_RATE * _ENVELOPE_HOP)
+    chunk_bytes = hop * _ENVELOPE_CHUNK * 2
+    levels = []
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            buf = proc.stdout.read(chunk_bytes)
+            n = len(buf) // (hop * 2)
+            if n:
+                pcm = np.frombuffer(buf[:n * hop * 2], dtype="<i2").astype(np.float32) / 32768.0
+                levels.append(np.mean(pcm.reshape(n, hop) ** 2, axis=1))
+            if len(buf) < chunk_bytes:
+                break
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+    if not levels:
+        return None
+    db = 10.0 * np.log10(np.concatenate(levels) + 1e-10)
+    floor = float(np.percentile(db, _SILENCE_FLOOR_PCT))
+    threshold = float(np.clip(floor + _SILENCE_ABOVE_FLOOR, *_SILENCE_DB_RANGE))
+    envelope = {
+        "hop": _ENVELOPE_HOP,
+        "db": np.round(db, 1).tolist(),
+        "threshold": round(threshold, 1),
+        "silences": _silences(db, threshold),
+    }
+    _save_cached(cache_path, video_path, envelope)
+    total = sum(e - s for s, e in envelope["silences"])
+    print(f"  Audio envelope: {len(db)} values, {len(envelope['silences'])} silences "
+          f"({total:.0f}s) below {threshold:.0f} dBFS")
+    return envelope
+
+
+# ── Loudness Windows ──────────────────────────────────────────────────────
+# EBU R128 momentary loudness (400 ms window) every 100 ms of source,
+# measured once. Those are exactly the gating blocks of BS.1770 integrated
+# loudness, so any clip's loudness is a gated mean over its windows — no
+# per-clip measurement pass.
+
+_LOUDNESS_HOP = 0.1  # seconds between momentary readings
+_ABS_GATE = -70.0  # LUFS
+_REL_GATE = -10.0  # LU below the ungated mean
+
+
+def load_loudness_windows(work_dir, video_path, audio_path=None):
+    """Load the source's momentary loudness readings, measuring them on first use.
+
+    One ffmpeg ebur128 pass over audio_path (the transcription MP3) when
+    present, else the source. Cached as loudness.json in the work dir.
+    Returns {"hop", "momentary": [LUFS, ...]} (reading i covers the 400 ms
+    ending at (i + 1) * hop), or None if the source has no audio.
+    """
+    cache_path = os.path.join(work_dir, "loudness.json")
+    cached = _load_cached(cache_path, video_path)
+    if cached:
+        return cached
+
+    src = audio_path if audio_path and os.path.exists(audio_path) else video_path
+    print(f"  Measuring loudness (EBU R128, {os.path.basename(src)}, once per source)...")
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", src, "-vn",
+        "-af", "ebur128=metadata=1,ametadata=mode=print:key=lavfi.r128.M:file=-",
+        "-f", "null", "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    momentary = [
+        round(float(line.split("=", 1)[1]), 1)
+        for line in result.stdout.splitlines()
+        if line.startswith("lavfi.r128.M=")
+    ]
+    if not momentary:
+        return None
+
+    data = {"hop": _LOUDNESS_HOP, "momentary": momentary}
+    _save_cached(cache_path, video_path, data)
+    print(f"  Loudness: {len(momentary)} windows, source integrated "
+          f"{range_loudness(data, [[0, len(momentary) * _LOUDNESS_HOP]]):.1f} LUFS")
+    return data
+
+
+def range_loudness(loudness, ranges):
+    """Gated integrated loudness (LUFS) over [[start, end], ...] seconds, or None if silent.
+
+    BS.1770: blocks under -70 LUFS are dropped, then blocks more than 10 LU
+    below the mean of the rest.
+    """
+    hop = loudness["hop"]
+    m = np.asarray(loudness["momentary"], dtype=np.float64)
+    picked = []
+    for start, end in ranges:
+        # Block i spans [(i + 1) * hop - 0.4, (i + 1) * hop]
+        lo = max(0, int(np.ceil((start + 0.4) / hop - 1 - 1e-9)))
+        hi = min(len(m), int(np.floor(end / hop - 1 + 1e-9)) + 1)
+        if hi > lo:
+            picked.append(m[lo:hi])
+    if not picked:
+        return None
+    blocks = np.concatenate(picked)
+    blocks = blocks[blocks > _ABS_GATE]
+    if not len(blocks):
+        return None
+    energy = 10.0 ** (blocks / 10.0)
+    gate = 10.0 * np.log10(energy.mean()) + _REL_GATE
+    gated = energy[blocks > gate]
+    return float(10.0 * np.log10(gated.mean()))
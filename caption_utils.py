@@ -0,0 +1,95 @@
+"""Caption utilities for Video Clipper pipeline.
+
+Turns the word-level transcript timings into ASS subtitle files for the
+vertical clips. ffmpeg's subtitles filter (libass) burns them in during
+the vertical encode — no extra pass. Pure Python, no dependencies.
+
+Words are dicts with "text", "start" and "end" (seconds, source time), as
+returned by transcript_utils.word_list.
+"""
+_MAX_WORDS = 3  # words per caption line
+_MAX_GAP = 0.6  # a pause longer than this (seconds) starts a new line
+_HOLD = 0.4  # seconds a line lingers after its last word if nothing follows
+_BREAK_AFTER = (".", "?", "!", ",", ";", ":")
+
+# 1080x1920 canvas (libass scales to the 720p Telegram copy). Yellow
+# PrimaryColour is the karaoke highlight, white SecondaryColour the rest.
+_ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1080
+PlayResY: 1920
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, \
+Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, \
+Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Caption,Arial,84,&H0000E5FF,&H00FFFFFF,&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,6,2,\
+2,80,80,480,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _group_lines(words):
+    """Split words into caption lines: short, and broken at pauses and punctuation."""
+    lines = []
+    current = []
+    for word in words:
+        if current and (
+            len(current) == _MAX_WORDS
+            or word["start"] - current[-1]["end"] > _MAX_GAP
+            or current[-1]["text"].endswith(_BREAK_AFTER)
+        ):
+            lines.append(current)
+            current = []
+        current.append(word)
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _ass_time(t):
+    """Format seconds as ASS H:MM:SS.cc."""
+    cs = max(0, int(round(t * 100)))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def _ass_text(text):
+    """Neutralise characters ASS would read as override tags or line breaks."""
+    return text.replace("\\", "/").replace("{", "(").replace("}", ")")
+
+
+def build_ass(words, start, end):
+    """ASS subtitle script for the clip [start, end), re-based to clip time.
+
+    words are the clip's words (see transcript_utils.word_list). Each line highlights its
+    words karaoke-style as they're spoken. Returns "" if nothing is said.
+    """
+    lines = _group_lines(words)
+    if not lines:
+        return ""
+
+    events = []
+    for n, line in enumerate(lines):
+        line_start = max(line[0]["start"], start)
+        line_end = min(line[-1]["end"] + _HOLD, end)
+        if n + 1 < len(lines):
+            line_end = min(line_end, lines[n + 1][0]["start"])  # never overlap the next line
+        line_end = max(line_end, line_start + 0.1)
+
+        parts = []
+        for i, word in enumerate(line):
+            until = line[i + 1]["start"] if i + 1 < len(line) else line_end
+            k = max(1, int(round((until - max(word["start"], line_start)) * 100)))
+            parts.append(f"{{\\k{k}}}{_ass_text(word['text'])}")
+        events.append(
+            f"Dialogue: 0,{_ass_time(line_start - start)},{_ass_time(line_end - start)},"
+            f"Caption,,0,0,0,,{' '.join(parts)}"
+        )
+    return _ASS_HEADER + "\n".join(events) + "\n"
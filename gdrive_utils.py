@@ -84,10 +84,10 @@ def extract_file_id(url):
 
 
 def get_file_metadata(service, file_id):
-    """Get file name, mime type, size, and parent folder."""
+    """Get file name, mime type, size, parent folder and content MD5."""
     meta = (
         service.files()
-        .get(fileId=file_id, fields="id,name,mimeType,size,parents")
+        .get(fileId=file_id, fields="id,name,mimeType,size,parents,md5Checksum")
         .execute()
     )
     return meta
@@ -100,19 +100,29 @@ def get_parent_folder(service, file_id):
     return parents[0] if parents else None
 
 
-def download_file(service, file_id, dest_path, progress_callback=None):
+def download_file(service, file_id, dest_path, progress_callback=None, on_chunk=None):
     """Download a file from Google Drive with progress logging.
 
-    Handles large files (>2GB) via chunked download.
+    Handles large files (>2GB) via chunked download. on_chunk(data), if
+    given, receives each chunk's bytes right after they're written to disk,
+    so the stream can be teed into another consumer.
     """
     request = service.files().get_media(fileId=file_id)
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
+    buffer = io.BytesIO()
     with open(dest_path, "wb") as fh:
-        downloader = MediaIoBaseDownload(fh, request, chunksize=50 * 1024 * 1024)
+        downloader = MediaIoBaseDownload(buffer if on_chunk else fh, request,
+                                         chunksize=50 * 1024 * 1024)
         done = False
         while not done:
             status, done = downloader.next_chunk()
+            if on_chunk:
+                data = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                fh.write(data)
+                on_chunk(data)
             if status and progress_callback:
                 progress_callback(status.progress())
             elif status:
@@ -1,7 +1,7 @@
 """Telegram Bot utilities for Video Clipper pipeline.
 
-Sends status updates, files (transcripts, clips JSON), and video clips
-to a Telegram chat. Uses raw urllib — no extra dependencies.
+Sends status updates, files (transcripts, clips JSON), review thumbnails
+and video clips to a Telegram chat. Uses raw urllib — no extra dependencies.
 
 Env vars: VIDEO_CLIPPER_BOT_TOKEN, VIDEO_CLIPPER_CHAT_ID
 """
@@ -186,6 +186,57 @@ def send_video(filepath, caption=None):
         return False
 
 
+def send_media_group(photos):
+    """Send photos as Telegram albums (media groups of up to 10 items).
+
+    photos: list of (filepath, caption or None) tuples, in display order.
+    A leftover single photo goes out as a document (albums need 2+ items).
+    Returns True if everything was sent.
+    """
+    token, chat_id = _get_config()
+    if not token or not chat_id:
+        print(f"[Telegram] No config — skipping {len(photos)} photos")
+        return False
+
+    ok = True
+    for i in range(0, len(photos), 10):
+        group = photos[i:i + 10]
+        if len(group) == 1:
+            ok = send_document(*group[0]) and ok
+            continue
+
+        media = []
+        files = []
+        for j, (filepath, caption) in enumerate(group):
+            item = {"type": "photo", "media": f"attach://photo{j}"}
+            if caption:
+                item["caption"] = caption[:1024]
+                item["parse_mode"] = "HTML"
+            media.append(item)
+            files.append((f"photo{j}", os.path.basename(filepath), filepath))
+
+        body, content_type = _multipart_encode(
+            {"chat_id": chat_id, "media": json.dumps(media)}, files
+        )
+        req = urllib.request.Request(
+            _api_url(token, "sendMediaGroup"),
+            data=body,
+            headers={"Content-Type": content_type},
+        )
+        try:
+            resp = urllib.request.urlopen(req, timeout=120)
+            result = json.loads(resp.read())
+            if result.get("ok"):
+                print(f"  [Telegram] Sent album: {len(group)} photos")
+            else:
+                print(f"  [Telegram] sendMediaGroup error: {result}")
+                ok = False
+        except Exception as e:
+            print(f"  [Telegram] sendMediaGroup failed: {e}")
+            ok = False
+    return ok
+
+
 # ── Pipeline-Specific Helpers ─────────────────────────────────────────────
 
 def notify_step(step_name, video_name, details=""):
@@ -196,6 +247,7 @@ def notify_step(step_name, video_name, details=""):
         "transcribe_start": "studio_microphone",
         "transcribe_done": "white_check_mark",
         "clips_identified": "scissors",
+        "thumbnails": "frame_with_picture",
         "draft_cut": "clapper",
         "cutting_start": "hourglass_flowing_sand",
         "cutting_done": "white_check_mark",
@@ -210,6 +262,7 @@ def notify_step(step_name, video_name, details=""):
         "transcribe_start": "Transcribing with AssemblyAI",
         "transcribe_done": "Transcription complete",
         "clips_identified": "Clips identified",
+        "thumbnails": "Review thumbnails",
         "draft_cut": "Draft clip cut",
         "cutting_start": "Cutting all clips",
         "cutting_done": "All clips cut",
@@ -0,0 +1,37 @@
+"""Tests for analysis_utils: gated loudness over clip ranges."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_utils import range_loudness
+
+
+def _loudness(*levels):
+    """Momentary loudness at a 0.1 s hop from (LUFS, seconds) stretches."""
+    momentary = []
+    for lufs, seconds in levels:
+        momentary += [lufs] * int(round(seconds * 10))
+    return {"hop": 0.1, "momentary": momentary}
+
+
+class RangeLoudnessTest(unittest.TestCase):
+    def test_constant_level(self):
+        self.assertAlmostEqual(range_loudness(_loudness((-20.0, 10.0)), [[1.0, 9.0]]), -20.0)
+
+    def test_quiet_stretch_is_gated_out(self):
+        loudness = _loudness((-20.0, 5.0), (-40.0, 5.0))
+        self.assertAlmostEqual(range_loudness(loudness, [[0.0, 10.0]]), -20.0)
+
+    def test_only_the_given_ranges_count(self):
+        loudness = _loudness((-30.0, 5.0), (-18.0, 5.0), (-30.0, 5.0))
+        self.assertAlmostEqual(range_loudness(loudness, [[0.0, 4.0], [11.0, 15.0]]), -30.0)
+
+    def test_silence_gives_none(self):
+        self.assertIsNone(range_loudness(_loudness((-80.0, 5.0)), [[0.0, 5.0]]))
+        self.assertIsNone(range_loudness(_loudness((-20.0, 5.0)), [[2.0, 2.2]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
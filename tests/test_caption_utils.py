@@ -0,0 +1,61 @@
+"""Tests for caption_utils: caption line grouping and ASS timing."""
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caption_utils import build_ass
+
+
+def _words(*words):
+    """Word dicts from (text, start s, end s)."""
+    return [{"text": text, "start": start, "end": end} for text, start, end in words]
+
+
+def _events(ass):
+    """(start, end, plain text) per Dialogue line, times as ASS strings."""
+    events = []
+    for line in ass.splitlines():
+        if line.startswith("Dialogue:"):
+            fields = line.split(",", 9)
+            events.append((fields[1], fields[2], re.sub(r"\{[^}]*\}", "", fields[9])))
+    return events
+
+
+def _seconds(t):
+    h, m, s = t.split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+class BuildAssTest(unittest.TestCase):
+    def test_no_words_gives_empty_script(self):
+        self.assertEqual(build_ass([], 0.0, 10.0), "")
+
+    def test_lines_hold_at_most_three_words(self):
+        words = _words(("one", 10.0, 10.2), ("two", 10.3, 10.5), ("three", 10.6, 10.8),
+                       ("four", 10.9, 11.1), ("five", 11.2, 11.4))
+        self.assertEqual([e[2] for e in _events(build_ass(words, 10.0, 12.0))],
+                         ["one two three", "four five"])
+
+    def test_breaks_at_pauses_and_punctuation(self):
+        words = _words(("Hi.", 1.0, 1.2), ("so", 1.3, 1.5), ("then", 3.0, 3.2))
+        self.assertEqual([e[2] for e in _events(build_ass(words, 0.0, 5.0))],
+                         ["Hi.", "so", "then"])
+
+    def test_lines_are_in_clip_time_and_never_overlap(self):
+        words = _words(("a", 60.0, 60.2), ("b.", 60.3, 60.4), ("c", 60.45, 60.6))
+        events = _events(build_ass(words, 59.5, 61.0))
+        self.assertEqual(events[0][0], "0:00:00.50")
+        for (_, end, _), (start, _, _) in zip(events, events[1:]):
+            self.assertLessEqual(_seconds(end), _seconds(start))
+        self.assertLessEqual(_seconds(events[-1][1]), 1.5)
+
+    def test_override_characters_are_neutralised(self):
+        ass = build_ass(_words(("{\\b1}", 0.0, 0.5)), 0.0, 1.0)
+        self.assertEqual(_events(ass)[0][2], "(/b1)")
+
+
+if __name__ == "__main__":
+    unittest.main()
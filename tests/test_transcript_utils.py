@@ -0,0 +1,166 @@
+"""Tests for transcript_utils: chunk planning and stitching, word-boundary snapping,
+jump-cut planning."""
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_utils import (
+    _speaker_map,
+    jump_cut_keep,
+    load_words,
+    plan_chunks,
+    save_words,
+    snap_clips_to_words,
+    stitch_chunks,
+)
+
+
+def _word_table(words):
+    """Round-trip (text, start ms, end ms) words through the .npz word table."""
+    path = os.path.join(tempfile.mkdtemp(), "words.npz")
+    save_words(path, [SimpleNamespace(text=text, start=start, end=end, confidence=0.9,
+                                      speaker="A") for text, start, end in words])
+    return load_words(path)
+
+
+def _chunk_transcript(words, audio_start, audio_end, labels=None):
+    """What AssemblyAI would return for [audio_start, audio_end) seconds of words.
+
+    words are (text, start ms, end ms, speaker) on the source timeline;
+    labels renames speakers the way an independent transcription might.
+    Utterances are runs of the same speaker.
+    """
+    offset = int(audio_start * 1000)
+    local = [
+        SimpleNamespace(text=text, start=start - offset, end=end - offset, confidence=0.9,
+                        speaker=(labels or {}).get(speaker, speaker))
+        for text, start, end, speaker in words
+        if audio_start * 1000 <= start < audio_end * 1000
+    ]
+    utterances = []
+    for w in local:
+        if utterances and utterances[-1].speaker == w.speaker:
+            utterances[-1].words.append(w)
+        else:
+            utterances.append(SimpleNamespace(speaker=w.speaker, words=[w]))
+    for u in utterances:
+        u.start, u.end = u.words[0].start, u.words[-1].end
+        u.text = " ".join(w.text for w in u.words)
+    return SimpleNamespace(words=local, utterances=utterances)
+
+
+class PlanChunksTest(unittest.TestCase):
+    def test_borders_snap_to_nearest_silence(self):
+        plan = plan_chunks(200.0, [[40.0, 42.0], [97.0, 99.0], [150.0, 152.0]], 2, overlap=20.0)
+        self.assertEqual(plan, [(0.0, 118.0, 0.0, 98.0), (78.0, 200.0, 98.0, 200.0)])
+
+    def test_split_at_target_without_nearby_silence(self):
+        plan = plan_chunks(300.0, [], 3, overlap=10.0)
+        self.assertEqual([p[2:] for p in plan], [(0.0, 100.0), (100.0, 200.0), (200.0, 300.0)])
+        self.assertEqual(plan[0][:2], (0.0, 110.0))
+        self.assertEqual(plan[-1][:2], (190.0, 300.0))
+
+
+class SpeakerMapTest(unittest.TestCase):
+    def test_swapped_labels_follow_shared_words(self):
+        prev_words = [
+            SimpleNamespace(text="one", start=90000, speaker="A"),
+            SimpleNamespace(text="two", start=95000, speaker="B"),
+        ]
+        # The next chunk starts at 80 s and calls the same voices B and A
+        words = [
+            SimpleNamespace(text="One", start=10050, speaker="B"),
+            SimpleNamespace(text="two.", start=14900, speaker="A"),
+        ]
+        self.assertEqual(_speaker_map(prev_words, words, 80000, 100.0, 20.0),
+                         {"B": "A", "A": "B"})
+
+
+class StitchChunksTest(unittest.TestCase):
+    def _stitch(self, words, plan, labels=(None, None)):
+        return stitch_chunks(
+            [(entry, _chunk_transcript(words, entry[0], entry[1], lab))
+             for entry, lab in zip(plan, labels)],
+            overlap=20.0,
+        )
+
+    def test_utterance_across_border_is_kept_whole(self):
+        words = [("hello", 95000, 99500, "A"), ("world", 100500, 101000, "A")]
+        plan = [(0.0, 120.0, 0.0, 100.0), (80.0, 200.0, 100.0, 200.0)]
+        result = self._stitch(words, plan)
+        self.assertEqual([w.text for w in result.words], ["hello", "world"])
+        self.assertEqual(
+            [(u.text, u.start, u.end, u.speaker) for u in result.utterances],
+            [("hello world", 95000, 101000, "A")],
+        )
+
+    def test_speaker_swap_is_reconciled(self):
+        words = [
+            ("we", 85000, 85400, "A"), ("started", 86000, 86500, "A"),
+            ("really", 92000, 92400, "B"), ("yes", 95000, 95300, "B"),
+            ("then", 105000, 105400, "A"), ("after", 110000, 110400, "B"),
+        ]
+        plan = [(0.0, 120.0, 0.0, 100.0), (80.0, 200.0, 100.0, 200.0)]
+        result = self._stitch(words, plan, labels=(None, {"A": "B", "B": "A"}))
+        self.assertEqual([(w.text, w.speaker) for w in result.words],
+                         [(t, s) for t, _, _, s in words])
+        self.assertEqual([(u.text, u.speaker) for u in result.utterances], [
+            ("we started", "A"), ("really yes", "B"), ("then", "A"), ("after", "B"),
+        ])
+
+
+class SnapClipsToWordsTest(unittest.TestCase):
+    # Neighbours sit closer than the margins, so both boundaries are tight
+    WORDS = [("so", 1500, 2663), ("hello", 2900, 3200), ("world", 20000, 20500),
+             ("end", 20600, 21000), ("next", 21017, 21400)]
+
+    def test_margins_around_first_and_last_word(self):
+        words = _word_table([("hi", 5000, 5400), ("there", 9000, 9500)])
+        starts, ends, tight_s, tight_e = snap_clips_to_words(words, [5.2], [9.6])
+        self.assertAlmostEqual(starts[0], 4.5)
+        self.assertAlmostEqual(ends[0], 10.0)
+        self.assertFalse(tight_s[0] or tight_e[0])
+
+    def test_tight_boundaries_stay_off_the_neighbours(self):
+        words = _word_table(self.WORDS)
+        starts, ends, tight_s, tight_e = snap_clips_to_words(words, [2.8], [20.9])
+        self.assertTrue(tight_s[0] and tight_e[0])
+        self.assertGreaterEqual(starts[0], 2.663)
+        self.assertLessEqual(ends[0], 21.017)
+
+    def test_snapping_is_idempotent(self):
+        words = _word_table(self.WORDS)
+        once = snap_clips_to_words(words, [2.8, 2.0], [20.9, 20.1])[:2]
+        twice = snap_clips_to_words(words, *[[round(float(t), 2) for t in ts] for ts in once])[:2]
+        for a, b in zip(once, twice):
+            self.assertEqual([round(float(t), 2) for t in a], [round(float(t), 2) for t in b])
+
+
+class JumpCutKeepTest(unittest.TestCase):
+    # Only the keep ranges are tested here; _output_time (the shortened
+    # timeline) lives in video_clipper.py, which needs ffmpeg and the APIs.
+
+    def test_filler_between_words_is_cut(self):
+        words = _word_table([("so", 1000, 1300), ("um,", 1500, 1800), ("yes", 2000, 2300)])
+        self.assertEqual(jump_cut_keep(words, 0.5, 3.0), [[0.5, 1.4], [1.9, 3.0]])
+
+    def test_long_pause_is_cut_down_to_the_pad(self):
+        words = _word_table([("so", 1000, 1300), ("yes", 2500, 2800)])
+        self.assertEqual(jump_cut_keep(words, 0.5, 3.0), [[0.5, 1.4], [2.4, 3.0]])
+
+    def test_leading_filler_is_cut_on_its_own(self):
+        words = _word_table([("Uh", 600, 900), ("hello", 1000, 1400)])
+        self.assertEqual(jump_cut_keep(words, 0.5, 3.0), [[0.5, 0.6], [0.9, 3.0]])
+
+    def test_short_cut_is_skipped(self):
+        words = _word_table([("so", 1000, 1300), ("um", 1310, 1500), ("yes", 1520, 1800),
+                             ("and", 2000, 2300)])
+        self.assertEqual(jump_cut_keep(words, 0.5, 3.0), [[0.5, 3.0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
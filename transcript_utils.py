@@ -0,0 +1,336 @@
+"""Word-level transcript utilities for Video Clipper pipeline.
+
+Stores AssemblyAI's word timings in a compact columnar form — one .npz of
+NumPy arrays — so cutting, captioning and clip validation can look words
+up by time without paying for another transcription.
+
+Layout (all arrays the same length n, sorted by start):
+    start_ms, end_ms   int32   word timing in source milliseconds
+    confidence         float32 AssemblyAI confidence (0–1)
+    speaker            int16   index into speakers
+    text_offsets       int64   n + 1 offsets into text_blob (UTF-8)
+plus text_blob (uint8) and speakers (unicode array). Lookups are binary
+searches over start_ms / end_ms.
+"""
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+
+def save_words(path, words):
+    """Persist AssemblyAI Word objects (text, start, end, confidence, speaker) as .npz."""
+    words = sorted(words, key=lambda w: w.start)
+    speakers = sorted({w.speaker or "?" for w in words})
+    speaker_ids = {s: i for i, s in enumerate(speakers)}
+
+    encoded = [w.text.encode("utf-8") for w in words]
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    np.savez_compressed(
+        path,
+        start_ms=np.array([w.start for w in words], dtype=np.int32),
+        end_ms=np.array([w.end for w in words], dtype=np.int32),
+        confidence=np.array([w.confidence or 0.0 for w in words], dtype=np.float32),
+        speaker=np.array([speaker_ids[w.speaker or "?"] for w in words], dtype=np.int16),
+        text_offsets=offsets,
+        text_blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        speakers=np.array(speakers or ["?"], dtype=str),
+    )
+
+
+def load_words(path):
+    """Load a word table saved by save_words (dict of arrays), or None if missing."""
+    if not path or not path.endswith(".npz") or not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def word_count(words):
+    """Number of words in the table."""
+    return len(words["start_ms"])
+
+
+def word_range(words, start, end):
+    """Index range (lo, hi) of the words starting in [start, end) seconds."""
+    starts = words["start_ms"]
+    lo = int(np.searchsorted(starts, start * 1000.0, side="left"))
+    hi = int(np.searchsorted(starts, end * 1000.0, side="left"))
+    return lo, hi
+
+
+def word_text(words, i):
+    """Text of word i."""
+    offsets = words["text_offsets"]
+    return words["text_blob"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def word_list(words, lo, hi):
+    """Words lo..hi-1 as dicts (text, start/end seconds, speaker, confidence)."""
+    speakers = words["speakers"]
+    return [
+        {
+            "text": word_text(words, i),
+            "start": int(words["start_ms"][i]) / 1000.0,
+            "end": int(words["end_ms"][i]) / 1000.0,
+            "speaker": str(speakers[words["speaker"][i]]),
+            "confidence": round(float(words["confidence"][i]), 4),
+        }
+        for i in range(lo, hi)
+    ]
+
+
+def nearest_boundary(words, t, edge="start"):
+    """Nearest word start (edge="start") or end (edge="end") to t, in seconds.
+
+    None for an empty table.
+    """
+    column = words["start_ms"] if edge == "start" else words["end_ms"]
+    if not len(column):
+        return None
+    i = int(np.searchsorted(column, t * 1000.0))
+    candidates = column[max(0, i - 1):i + 1]
+    best = candidates[np.argmin(np.abs(candidates - t * 1000.0))]
+    return int(best) / 1000.0
+
+
+def snap_clips_to_words(words, starts, ends, lead=(0.5, 1.0), tail=0.5):
+    """Move clip boundaries onto the speech, for many clips at once.
+
+    starts/ends are clip times in seconds (sequences of equal length). A
+    start lands lead[0]–lead[1] s before the first word (a word the start
+    falls inside counts as the first word); an end lands tail s after the
+    last word that starts before it. A margin never reaches into the
+    neighbouring word — those boundaries come back flagged as tight.
+    Results are on a 10 ms grid, starts rounded up and ends down, so a
+    tight boundary never rounds into its neighbour and snapping again is a
+    no-op.
+
+    Returns (new starts, new ends, tight starts, tight ends) as arrays.
+    Boundaries with no word to anchor on are left as they are.
+    """
+    s = np.asarray(starts, dtype=np.float64) * 1000.0
+    e = np.asarray(ends, dtype=np.float64) * 1000.0
+    n = word_count(words)
+    if not n:
+        none = np.zeros(len(s), dtype=bool)
+        return s / 1000.0, e / 1000.0, none, none
+    start_ms = words["start_ms"].astype(np.float64)
+    end_ms = words["end_ms"].astype(np.float64)
+
+    # First word still sounding at the start
+    i = np.searchsorted(end_ms, s, side="right")
+    has_first = i < n
+    i = np.minimum(i, n - 1)
+    new_s = np.clip(s, start_ms[i] - lead[1] * 1000.0, start_ms[i] - lead[0] * 1000.0)
+    prev_end = np.where(i > 0, end_ms[np.maximum(i - 1, 0)], -np.inf)
+    tight_s = new_s < prev_end
+    new_s = np.ceil(np.maximum(np.maximum(new_s, prev_end), 0.0) / 10.0) * 10.0
+
+    # Last word that starts before the end
+    j = np.searchsorted(start_ms, e, side="left") - 1
+    has_last = j >= 0
+    j = np.maximum(j, 0)
+    new_e = end_ms[j] + tail * 1000.0
+    next_start = np.where(j + 1 < n, start_ms[np.minimum(j + 1, n - 1)], np.inf)
+    tight_e = new_e > next_start
+    new_e = np.floor(np.minimum(new_e, next_start) / 10.0) * 10.0
+
+    ok = has_first & has_last & (new_e > new_s)
+    new_s = np.where(ok, new_s, s)
+    new_e = np.where(ok, new_e, e)
+    return new_s / 1000.0, new_e / 1000.0, tight_s & ok, tight_e & ok
+
+
+_FILLER_WORDS = frozenset({"um", "umm", "uh", "uhh", "uhm", "er", "erm", "ah", "hmm", "mm", "mhm"})
+
+
+def _is_filler(text):
+    """True for "um", "uh" and friends (AssemblyAI transcribes them with disfluencies on)."""
+    return text.lower().strip(".,?!;:-…\"'") in _FILLER_WORDS
+
+
+def jump_cut_keep(words, start, end, max_pause=0.6, pad=0.1, min_cut=0.15):
+    """Stretches of [start, end) to keep once fillers and long pauses are cut.
+
+    Between two spoken (non-filler) words, the gap is cut down to pad on
+    each side when it holds a filler or is longer than max_pause. Fillers
+    before the first / after the last spoken word are cut on their own.
+    Cuts shorter than min_cut aren't worth a join and are skipped.
+    Returns [[keep start, keep end], ...] in source seconds.
+    """
+    lo, hi = word_range(words, start, end)
+    starts = words["start_ms"][lo:hi] / 1000.0
+    ends = words["end_ms"][lo:hi] / 1000.0
+    filler = np.array([_is_filler(word_text(words, i)) for i in range(lo, hi)], dtype=bool)
+    spoken = np.flatnonzero(~filler)
+
+    cuts = []
+    for a, b in zip(spoken[:-1], spoken[1:]):
+        if b - a > 1 or starts[b] - ends[a] > max_pause:
+            cuts.append((ends[a] + pad, starts[b] - pad))
+    if len(spoken):
+        edge_fillers = np.flatnonzero(filler)
+        edge_fillers = edge_fillers[(edge_fillers < spoken[0]) | (edge_fillers > spoken[-1])]
+        cuts += [(starts[i], min(ends[i], end)) for i in edge_fillers]
+
+    keep = []
+    cursor = start
+    for cut_start, cut_end in sorted(cuts):
+        cut_start = max(cut_start, cursor)
+        if cut_end - cut_start < min_cut:
+            continue
+        keep.append([round(float(cursor), 3), round(float(cut_start), 3)])
+        cursor = cut_end
+    keep.append([round(float(cursor), 3), round(float(end), 3)])
+    return [k for k in keep if k[1] - k[0] > 0.05]
+
+
+# ── Chunked Transcription ─────────────────────────────────────────────────
+# Long recordings are transcribed as N overlapping chunks in parallel. Chunk
+# borders sit in silences; the overlap lets each chunk's speaker labels be
+# matched to the previous chunk's by the words both of them heard.
+
+_CHUNK_OVERLAP = 20.0  # seconds each chunk reaches past its border
+_MATCH_TOLERANCE = 250  # ms between the same word in two chunks
+_MERGE_GAP = 1500  # ms — same-speaker utterances this close at a border are joined
+
+
+def plan_chunks(duration, silences, n, overlap=_CHUNK_OVERLAP):
+    """Split [0, duration) seconds into n chunks at the silences nearest the even splits.
+
+    silences is [[start, end], ...] (see analysis_utils.load_audio_envelope);
+    without a silence within half a chunk of a split point, the split is
+    made there anyway. Returns [(audio start, audio end, own start, own
+    end), ...]: the audio range to transcribe (padded by overlap) and the
+    part of the timeline the chunk is responsible for.
+    """
+    mids = sorted((s + e) / 2.0 for s, e in silences)
+    borders = []
+    for k in range(1, n):
+        target = duration * k / n
+        i = np.searchsorted(mids, target)
+        near = [m for m in mids[max(0, i - 1):i + 1] if abs(m - target) <= duration / (2 * n)]
+        borders.append(min(near, key=lambda m: abs(m - target)) if near else target)
+    edges = [0.0] + sorted(set(borders)) + [duration]
+    return [
+        (max(0.0, a - overlap), min(duration, b + overlap), a, b)
+        for a, b in zip(edges[:-1], edges[1:])
+        if b > a
+    ]
+
+
+def _norm(text):
+    """Word text for matching across chunks."""
+    return text.lower().strip(".,?!;:-…\"'")
+
+
+def _speaker_map(prev_words, words, offset, own_start, overlap):
+    """Map a chunk's local speaker labels onto the global labels of prev_words.
+
+    prev_words are ALL of the previous chunk's words (overlap included), on
+    the source timeline and already relabelled.
+
+    Votes come from words both chunks transcribed in the overlap (same text,
+    start within _MATCH_TOLERANCE); labels are paired greedily by vote count.
+    """
+    lo, hi = (own_start - overlap) * 1000.0, (own_start + overlap) * 1000.0
+    heard = {}
+    for w in prev_words:
+        if lo <= w.start < hi:
+            heard.setdefault(_norm(w.text), []).append(w)
+    votes = {}
+    for w in words:
+        start = w.start + offset
+        if not lo <= start < hi:
+            continue
+        for prev in heard.get(_norm(w.text), ()):
+            if abs(prev.start - start) <= _MATCH_TOLERANCE:
+                key = (w.speaker or "?", prev.speaker)
+                votes[key] = votes.get(key, 0) + 1
+                break
+    mapping, taken = {}, set()
+    for (local, glob), _ in sorted(votes.items(), key=lambda kv: -kv[1]):
+        if local not in mapping and glob not in taken:
+            mapping[local] = glob
+            taken.add(glob)
+    return mapping
+
+
+def _next_label(used):
+    """First speaker label (A, B, ..., Z, AA, ...) not in used."""
+    n = 0
+    while True:
+        label, k = "", n
+        while True:
+            label = chr(ord("A") + k % 26) + label
+            k = k // 26 - 1
+            if k < 0:
+                break
+        if label not in used:
+            return label
+        n += 1
+
+
+def stitch_chunks(chunks, overlap=_CHUNK_OVERLAP):
+    """Join per-chunk transcripts into one, on the source timeline.
+
+    chunks is [(plan entry from plan_chunks, transcript), ...] in order.
+    Each chunk contributes the words starting in its own range, shifted by
+    its audio start, and every utterance with words there — trimmed to
+    those words, so an utterance running across a border is split between
+    the two chunks and its halves rejoined. Speaker labels are reconciled
+    across borders (see _speaker_map). Returns a namespace with .words and
+    .utterances shaped like AssemblyAI's (times in ms).
+    """
+    words, utterances, used = [], [], set()
+    prev_words = []
+    for n, ((audio_start, _, own_start, own_end), transcript) in enumerate(chunks):
+        offset = int(round(audio_start * 1000))
+        lo, hi = own_start * 1000.0, own_end * 1000.0
+        last = n == len(chunks) - 1
+
+        mapping = _speaker_map(prev_words, transcript.words, offset, own_start, overlap) if n else {}
+        for local in sorted({w.speaker or "?" for w in transcript.words}
+                            | {u.speaker or "?" for u in transcript.utterances}):
+            if local not in mapping:
+                mapping[local] = local if not n and local not in used else _next_label(used)
+            used.add(mapping[local])
+
+        def _inside(t):
+            return lo <= t + offset and (t + offset < hi or last)
+
+        prev_words = [
+            SimpleNamespace(text=w.text, start=w.start + offset, end=w.end + offset,
+                            confidence=w.confidence, speaker=mapping[w.speaker or "?"])
+            for w in transcript.words
+        ]
+        words += [w for w in prev_words if _inside(w.start - offset)]
+
+        first = True
+        for u in transcript.utterances:
+            if u.words:
+                u_words = [w for w in u.words if _inside(w.start)]
+                if not u_words:
+                    continue
+                start, end = u_words[0].start, u_words[-1].end
+                text = " ".join(w.text for w in u_words)
+            elif _inside(u.start):  # no word detail — keep or drop it whole
+                start, end, text = u.start, u.end, u.text
+            else:
+                continue
+            speaker = mapping[u.speaker or "?"]
+            prev = utterances[-1] if utterances else None
+            at_border, first = first, False
+            if at_border and prev and prev.speaker == speaker \
+                    and start + offset - prev.end <= _MERGE_GAP:
+                prev.end = end + offset
+                prev.text = f"{prev.text} {text}"
+                continue
+            utterances.append(SimpleNamespace(
+                speaker=speaker, start=start + offset, end=end + offset, text=text,
+            ))
+
+    return SimpleNamespace(words=words, utterances=utterances)
@@ -18,23 +18,46 @@ Usage:
   python video_clipper.py --dry-run
 """
 import argparse
+import asyncio
+import bisect
+import collections
+import functools
+import gzip
+import hashlib
+import heapq
 import json
 import os
 import queue as queue_mod
 import re
+import shutil
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
+from types import SimpleNamespace
 
 # Add parent dirs so we can import gdrive_utils when run from repo root
 _DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, _DIR)
 
 import assemblyai as aai
-
+import httpx  # the AssemblyAI SDK's HTTP client (for its transport errors)
+
+from analysis_utils import (
+    crop_moves,
+    load_audio_envelope,
+    load_loudness_windows,
+    load_reframe_track,
+    load_scene_index,
+    load_speaker_positions,
+    range_loudness,
+    snap_to_scene,
+    speaker_crop_moves,
+)
+from caption_utils import build_ass
 from gdrive_utils import (
     authenticate,
     create_folder,
@@ -48,9 +71,20 @@ from telegram_utils import (
     notify_step,
     send_clips_summary,
     send_document,
+    send_media_group,
     send_message,
     send_video,
 )
+from transcript_utils import (
+    jump_cut_keep,
+    load_words,
+    plan_chunks,
+    save_words,
+    stitch_chunks,
+    snap_clips_to_words,
+    word_list,
+    word_range,
+)
 
 # ── Paths & Config ────────────────────────────────────────────────────────
 _REPO_ROOT = _DIR
@@ -124,6 +158,75 @@ def _save_state(work_dir, state):
         json.dump(state, f, indent=2)
 
 
+# ── ffmpeg Runner ─────────────────────────────────────────────────────────
+
+_BACKGROUND_NICE = 10  # niceness of background ffmpeg jobs, so foreground renders win the CPU
+_STDERR_TAIL_LINES = 40  # ring buffer size for ffmpeg stderr (for error messages)
+_PROGRESS_INTERVAL = 5  # seconds between batch progress lines
+
+
+def _parse_progress(block, duration=None):
+    """Turn one ffmpeg -progress block into {out_time, fps, speed, percent, done}."""
+    def _num(value):
+        try:
+            return float(value.rstrip("x"))
+        except (AttributeError, ValueError):
+            return None
+
+    out_time_us = _num(block.get("out_time_us"))
+    out_time = out_time_us / 1e6 if out_time_us is not None else 0.0
+    stats = {
+        "out_time": out_time,
+        "fps": _num(block.get("fps")),
+        "speed": _num(block.get("speed")),
+        "duration": duration,
+        "percent": min(100.0, 100.0 * out_time / duration) if duration else None,
+        "done": block.get("progress") == "end",
+    }
+    return stats
+
+
+def _run_ffmpeg(cmd, on_progress=None, duration=None, niceness=0):
+    """Run an ffmpeg command, streaming its progress instead of buffering output.
+
+    Adds -progress pipe:1 and parses the key=value blocks as they arrive,
+    calling on_progress(stats) for each (see _parse_progress; duration is
+    the expected output length, used for percent). stderr is drained in a
+    thread into a bounded ring buffer, so hour-long runs don't pile up
+    megabytes of log in memory. niceness > 0 lowers ffmpeg's CPU priority
+    right after spawn (os.setpriority — no preexec_fn, which isn't safe
+    from worker threads).
+
+    Returns a CompletedProcess whose stderr is the last lines of ffmpeg's
+    stderr and whose stdout is the final progress stats (or None).
+    """
+    cmd = [cmd[0], "-nostdin", "-nostats", "-progress", "pipe:1"] + list(cmd[1:])
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            stdin=subprocess.DEVNULL, text=True)
+    if niceness and hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, proc.pid, niceness)
+        except OSError:
+            pass  # already exited, or not permitted — run at normal priority
+    tail = collections.deque(maxlen=_STDERR_TAIL_LINES)
+    drain = threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True)
+    drain.start()
+
+    block, last = {}, None
+    for line in proc.stdout:
+        key, _, value = line.strip().partition("=")
+        block[key] = value
+        if key == "progress":
+            last = _parse_progress(block, duration)
+            block = {}
+            if on_progress:
+                on_progress(last)
+
+    proc.wait()
+    drain.join()
+    return subprocess.CompletedProcess(cmd, proc.returncode, last, "".join(tail))
+
+
 # ── Step 0: Local File Ingest ────────────────────────────────────────────
 
 def step_local_ingest(local_path):
@@ -172,8 +275,79 @@ def step_local_ingest(local_path):
 
 # ── Step 1: Download ─────────────────────────────────────────────────────
 
-def step_download(drive_url):
-    """Download video from Google Drive. Returns (work_dir, state)."""
+_TEE_QUEUE_CHUNKS = 4  # download chunks (50 MB each) buffered ahead of the audio encoder
+
+
+def _audio_path(work_dir, video_path):
+    """The transcription MP3 for a source."""
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(work_dir, f"{base_name}.mp3")
+
+
+def _start_audio_tee(audio_path):
+    """Start an ffmpeg that encodes the transcription MP3 from bytes fed to it.
+
+    Returns (feed, finish). feed(data) queues a downloaded chunk for the
+    encoder's stdin (a pump thread writes it, so encoding overlaps the
+    download); finish(complete) closes the pipe, waits, and moves the MP3 into
+    place if complete and ffmpeg succeeded. A source ffmpeg can't demux from a
+    pipe (e.g. an MP4 with its index at the end) just fails here — the bytes
+    are drained and step_transcribe extracts from disk as before.
+    """
+    partial = f"{audio_path}.part"
+    proc = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", "pipe:0",
+         "-vn", "-c:a", "libmp3lame", "-b:a", "128k", "-f", "mp3", "-y", partial],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    tail = collections.deque(maxlen=_STDERR_TAIL_LINES)
+    threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True).start()
+    chunks = queue_mod.Queue(maxsize=_TEE_QUEUE_CHUNKS)
+
+    def _pump():
+        broken = False
+        while True:
+            data = chunks.get()
+            if data is None:
+                break
+            if broken:
+                continue  # keep draining so the download never blocks on a dead encoder
+            try:
+                proc.stdin.write(data)
+            except OSError:
+                broken = True
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    pump = threading.Thread(target=_pump, daemon=True)
+    pump.start()
+
+    def finish(complete=True):
+        chunks.put(None)
+        pump.join()
+        proc.wait()
+        if complete and proc.returncode == 0 and os.path.exists(partial) and os.path.getsize(partial):
+            os.replace(partial, audio_path)
+            return True
+        if os.path.exists(partial):
+            os.remove(partial)
+        if complete:
+            error = b"".join(tail).decode(errors="replace").strip().splitlines()
+            print(f"  Streamed audio extraction failed ({error[-1] if error else 'ffmpeg error'}) "
+                  f"— will extract from disk")
+        return False
+
+    return chunks.put, finish
+
+
+def step_download(drive_url, stream_audio=False):
+    """Download video from Google Drive. Returns (work_dir, state).
+
+    stream_audio tees the download into an ffmpeg that writes the
+    transcription MP3 on the fly, so Step 2 doesn't re-read the file.
+    """
     print("\n=== Step 1: Download from Google Drive ===")
 
     service = authenticate()
@@ -198,7 +372,26 @@ def step_download(drive_url):
 
     notify_step("download_start", video_name, f"Size: {size_mb:.1f} MB")
 
-    download_file(service, file_id, video_path)
+    if stream_audio:
+        audio_path = _audio_path(work_dir, video_path)
+        feed, finish = _start_audio_tee(audio_path)
+        complete = False
+        try:
+            download_file(service, file_id, video_path, on_chunk=feed)
+            complete = True
+        finally:
+            streamed = finish(complete)
+        if streamed:
+            # A truncated demux can still exit 0 — trust the MP3 only if it spans the video
+            video_dur = _probe_video(video_path)["duration"]
+            audio_dur = _probe_video(audio_path)["duration"]
+            if video_dur and audio_dur and abs(video_dur - audio_dur) <= 1.0:
+                print(f"  Audio extracted during download: {audio_path}")
+            else:
+                os.remove(audio_path)
+                print("  Streamed audio is incomplete — will extract from disk")
+    else:
+        download_file(service, file_id, video_path)
 
     state.update({
         "step": "downloaded",
@@ -207,6 +400,7 @@ def step_download(drive_url):
         "drive_parent_id": parent_id,
         "video_name": video_name,
         "video_path": video_path,
+        "drive_md5": meta.get("md5Checksum"),  # transcript cache key
     })
     _save_state(work_dir, state)
 
@@ -215,61 +409,265 @@ def step_download(drive_url):
     return work_dir, state
 
 
-# ── Step 2: Transcribe ───────────────────────────────────────────────────
+# ── Step 1b: Mezzanine (optional) ────────────────────────────────────────
+# Phone and screen recordings often have 5–10 s GOPs and variable frame
+# rate: every -ss seek decodes seconds of wasted frames and VFR can drift
+# A/V. One CFR, 1-second-GOP intermediate is cheaper than paying that on
+# every clip.
+
+_MEZZ_MAX_GOP = 4.0  # seconds — longest keyframe gap before a source counts as long-GOP
+
+
+def _needs_mezzanine(video_path, keyframes):
+    """Return a reason string if the source is long-GOP or VFR, else None."""
+    source = _probe_video(video_path)
+    if source["vfr"]:
+        return f"variable frame rate (avg {source['fps'] or 0:.2f} fps)"
+    gaps = [b - a for a, b in zip(keyframes, keyframes[1:])]
+    if gaps and max(gaps) > _MEZZ_MAX_GOP:
+        return f"long GOP (keyframes up to {max(gaps):.1f}s apart)"
+    return None
+
+
+def _cut_source(state):
+    """The file cuts should read — the mezzanine if one was made, else the original."""
+    mezz = state.get("mezzanine_path")
+    if mezz and os.path.exists(mezz):
+        return mezz
+    return state["video_path"]
 
-def step_transcribe(work_dir, state):
-    """Extract audio, transcribe with AssemblyAI, generate SRT + markdown."""
-    print("\n=== Step 2: Transcribe via AssemblyAI ===")
+
+def step_mezzanine(work_dir, state, force=False):
+    """Transcode long-GOP / VFR sources once to a seek-friendly mezzanine.
+
+    Constant frame rate, a keyframe every second, high-quality CRF 16. Later
+    cuts read it via _cut_source. Skipped when the source is already fine
+    (unless force) or the mezzanine exists.
+    """
+    print("\n=== Step 1b: Mezzanine ===")
 
     video_name = state.get("video_name", "Unknown")
+    video_path = state["video_path"]
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    mezz_path = os.path.join(work_dir, f"{base_name}_mezzanine.mp4")
+
+    if state.get("mezzanine_path") == mezz_path and os.path.exists(mezz_path):
+        print(f"  Already built: {mezz_path}")
+        return state
+
+    reason = _needs_mezzanine(video_path, _load_keyframe_index(work_dir, video_path))
+    if not reason and not force:
+        print("  Source is CFR with short GOPs — cutting from the original")
+        return state
+
+    source = _probe_video(video_path)
+    fps = round(source["fps"] or 30, 3)
+    gop = str(max(1, round(fps)))
+    print(f"  Building mezzanine ({reason or 'forced'}) at {fps:g} fps CFR...")
+
+    last_pct = [-10]
+
+    def _report(stats):
+        if stats["percent"] is not None and stats["percent"] - last_pct[0] >= 10:
+            last_pct[0] = stats["percent"]
+            print(f"  Mezzanine: {stats['percent']:.0f}% ({stats['speed'] or 0:.1f}x)")
+
+    cmd = [
+        "ffmpeg", "-i", video_path,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"fps={fps}", "-pix_fmt", "yuv420p",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "16",
+        "-g", gop, "-keyint_min", gop, "-sc_threshold", "0",
+        "-af", "aresample=async=1:first_pts=0",
+        "-c:a", "aac", "-b:a", "192k",
+        "-movflags", "+faststart",
+        "-y", mezz_path,
+    ]
+    t0 = time.time()
+    result = _run_ffmpeg(cmd, _report, source["duration"])
+    if result.returncode != 0:
+        print(f"  ffmpeg error: {result.stderr[-500:]}")
+        if os.path.exists(mezz_path):
+            os.remove(mezz_path)
+        notify_step("error", video_name, "Mezzanine transcode failed — cutting from the original")
+        return state
+
+    print(f"  Mezzanine: {mezz_path} ({os.path.getsize(mezz_path) / 1024 / 1024:.1f} MB, "
+          f"{time.time() - t0:.0f}s)")
+    state["mezzanine_path"] = mezz_path
+    _save_state(work_dir, state)
+    return state
+
+
+# ── Step 2: Transcribe ───────────────────────────────────────────────────
+
+_TRANSCRIBE_OPTIONS = {
+    "speaker_labels": True,
+    "speech_models": ["universal-3-pro"],
+}
+
+
+def _transcribe_options(disfluencies=False):
+    """AssemblyAI options; disfluencies keeps "um"/"uh" as words for --jump-cut."""
+    return dict(_TRANSCRIBE_OPTIONS, disfluencies=disfluencies)
+
+# ── Transcript Cache ──
+# Raw transcripts shared across work dirs, keyed by the Drive md5Checksum
+# and/or a fingerprint of the extracted audio, so a renamed re-upload or a
+# cleaned .tmp never pays AssemblyAI twice. Kept outside .tmp on purpose.
+
+_TRANSCRIPT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR") or os.path.join(
+    _REPO_ROOT, ".transcript_cache"
+)
+
+
+def _transcript_cache_keys(state, audio_path=None, disfluencies=False):
+    """Cache keys for a source: Drive checksum first, then the audio fingerprint."""
+    options = json.dumps(_transcribe_options(disfluencies), sort_keys=True)
+    tag = hashlib.sha256(options.encode()).hexdigest()[:8]  # new options → new entries
+    keys = []
+    if state.get("drive_md5"):
+        keys.append(f"md5-{state['drive_md5']}-{tag}")
+    if audio_path and os.path.exists(audio_path):
+        keys.append(f"audio-{_file_digest(audio_path)}-{tag}")
+    return keys
+
+
+def _file_digest(path):
+    """SHA-256 of a whole file (read in 1 MiB blocks).
+
+    Used for the MP3 rather than _source_fingerprint: episodes sharing an
+    intro, outro and length would collide on head/tail samples, and a
+    collision here serves the wrong transcript.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:32]
+
+
+def _load_transcript_payload(path):
+    """Load a gzipped transcript payload, or None if missing or unreadable."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _transcript_cache_get(keys):
+    """Cached transcript payload for the first key that hits, else None."""
+    for key in keys:
+        payload = _load_transcript_payload(
+            os.path.join(_TRANSCRIPT_CACHE_DIR, f"{key}.json.gz")
+        )
+        if payload is not None:
+            return payload
+    return None
+
+
+def _save_transcript_payload(path, payload):
+    """Write a transcript payload gzipped (atomic)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _transcript_cache_put(keys, payload):
+    """Store a transcript payload under every key (atomic per entry)."""
+    os.makedirs(_TRANSCRIPT_CACHE_DIR, exist_ok=True)
+    for key in keys:
+        _save_transcript_payload(os.path.join(_TRANSCRIPT_CACHE_DIR, f"{key}.json.gz"), payload)
+
+
+def _transcript_payload(transcript):
+    """JSON-ready transcript: the raw API response, or the same shape for stitched chunks."""
+    raw = getattr(transcript, "json_response", None)
+    if raw:
+        return raw
+    return {
+        "words": [vars(w) for w in transcript.words],
+        "utterances": [vars(u) for u in transcript.utterances],
+    }
+
+
+def _transcript_from_payload(payload):
+    """Transcript-like object (.words / .utterances, times in ms) from a payload."""
+    return SimpleNamespace(
+        words=[SimpleNamespace(**w) for w in payload.get("words") or []],
+        utterances=[SimpleNamespace(**u) for u in payload.get("utterances") or []],
+    )
+
+
+def step_transcribe(work_dir, state, chunks=1, disfluencies=False):
+    """Extract audio, transcribe with AssemblyAI, generate SRT + markdown.
+
+    chunks > 1 transcribes the audio as that many parallel pieces (see
+    _transcribe_chunked). disfluencies keeps filler words for --jump-cut.
+    """
+    print("\n=== Step 2: Transcribe via AssemblyAI ===")
 
     if state.get("step") in ("transcribed", "clips_identified", "cut", "uploaded"):
         print(f"  Already transcribed. SRT: {state.get('srt_path')}")
         return state
 
+    audio_path, cache_keys, transcript = _prepare_transcription(work_dir, state, disfluencies)
+    if transcript is None:
+        transcript = _transcribe_audio(work_dir, state["video_path"], audio_path, chunks,
+                                       state.get("video_name", "Unknown"), disfluencies)
+        _transcript_cache_put(cache_keys, _transcript_payload(transcript))
+
+    return _finish_transcription(work_dir, state, transcript, audio_path, disfluencies)
+
+
+def _prepare_transcription(work_dir, state, disfluencies=False):
+    """Extract the MP3 and check the transcript cache.
+
+    Returns (audio_path, cache_keys, transcript) — transcript is None unless
+    the cache hit.
+    """
+    video_name = state.get("video_name", "Unknown")
     video_path = state["video_path"]
-    base_name = os.path.splitext(os.path.basename(video_path))[0]
+
+    # A Drive checksum hit needs no audio at all
+    audio_path = _audio_path(work_dir, video_path)
+    cache_keys = _transcript_cache_keys(state, disfluencies=disfluencies)
+    cached = _transcript_cache_get(cache_keys)
 
     # Extract audio as MP3
-    audio_path = os.path.join(work_dir, f"{base_name}.mp3")
-    if not os.path.exists(audio_path):
+    if cached is None and not os.path.exists(audio_path):
         print("  Extracting audio...")
         cmd = [
             "ffmpeg", "-i", video_path,
             "-vn", "-c:a", "libmp3lame", "-b:a", "128k",
             "-y", audio_path,
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = _run_ffmpeg(cmd)
         if result.returncode != 0:
             print(f"  ffmpeg error: {result.stderr[-500:]}")
             notify_step("error", video_name, "Audio extraction failed (ffmpeg error)")
             raise RuntimeError("Audio extraction failed")
         print(f"  Audio: {audio_path} ({os.path.getsize(audio_path) / 1024 / 1024:.1f} MB)")
-    else:
+    elif os.path.exists(audio_path):
         print(f"  Audio already extracted: {audio_path}")
 
-    # Transcribe with AssemblyAI
-    api_key = os.environ.get("ASSEMBLYAI_API_KEY", "")
-    if not api_key:
-        notify_step("error", video_name, "ASSEMBLYAI_API_KEY not set in .env")
-        raise RuntimeError("ASSEMBLYAI_API_KEY not set in .env")
-
-    aai.settings.api_key = api_key
-
-    notify_step("transcribe_start", video_name, "Uploading audio to AssemblyAI...")
+    if cached is None:
+        cache_keys = _transcript_cache_keys(state, audio_path, disfluencies)
+        cached = _transcript_cache_get(cache_keys)
 
-    print("  Uploading to AssemblyAI and transcribing (this may take a few minutes)...")
-    config = aai.TranscriptionConfig(
-        speaker_labels=True,
-        speech_models=["universal-3-pro"],
-    )
+    if cached is None:
+        return audio_path, cache_keys, None
+    print("  Transcript cache hit — rebuilding files locally, no AssemblyAI call")
+    return audio_path, cache_keys, _transcript_from_payload(cached)
 
-    transcriber = aai.Transcriber()
-    transcript = transcriber.transcribe(audio_path, config=config)
 
-    if transcript.status == aai.TranscriptStatus.error:
-        notify_step("error", video_name, f"Transcription failed: {transcript.error}")
-        raise RuntimeError(f"Transcription failed: {transcript.error}")
+def _finish_transcription(work_dir, state, transcript, audio_path, disfluencies=False):
+    """Write SRT, markdown, utterances and word timings, upload, notify."""
+    video_name = state.get("video_name", "Unknown")
+    video_path = state["video_path"]
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
 
     word_count = len(transcript.words)
     utt_count = len(transcript.utterances)
@@ -277,15 +675,12 @@ def step_transcribe(work_dir, state):
 
     print(f"  Transcription complete. {word_count} words, {utt_count} utterances.")
 
-    # Build SRT from utterances (with speaker labels)
-    srt_path = os.path.join(work_dir, f"{base_name}.srt")
-    _build_srt(transcript, srt_path)
-    print(f"  SRT: {srt_path}")
+    # Keep the full response so every file below can be rebuilt offline
+    payload_path = os.path.join(work_dir, f"{base_name}_transcript.json.gz")
+    _save_transcript_payload(payload_path, _transcript_payload(transcript))
 
-    # Build markdown transcript
-    md_path = os.path.join(work_dir, f"{base_name}_transcript.md")
-    _build_transcript_md(transcript, md_path, base_name)
-    print(f"  Transcript: {md_path}")
+    paths = _write_transcript_files(work_dir, base_name, transcript)
+    srt_path, md_path = paths["srt_path"], paths["transcript_path"]
 
     # Upload transcript + SRT to Drive
     service = authenticate()
@@ -295,11 +690,12 @@ def step_transcribe(work_dir, state):
         upload_file(service, srt_path, parent_id)
         upload_file(service, md_path, parent_id)
 
+    state.update(paths)
     state.update({
         "step": "transcribed",
-        "srt_path": srt_path,
-        "transcript_path": md_path,
+        "transcript_payload_path": payload_path,
         "audio_path": audio_path,
+        "disfluencies": disfluencies,
         "word_count": word_count,
         "utterance_count": utt_count,
     })
@@ -327,6 +723,281 @@ def step_transcribe(work_dir, state):
     return state
 
 
+def _write_transcript_files(work_dir, base_name, transcript):
+    """Render every file derived from the transcript. Returns their paths by state key."""
+    # Build SRT from utterances (with speaker labels)
+    srt_path = os.path.join(work_dir, f"{base_name}.srt")
+    _build_srt(transcript, srt_path)
+    print(f"  SRT: {srt_path}")
+
+    # Keep the speaker timeline for speaker-following crops
+    utterances_path = os.path.join(work_dir, f"{base_name}_utterances.json")
+    _build_utterances_json(transcript, utterances_path)
+
+    # ...and the word timings (columnar) for captions and boundary checks
+    words_path = os.path.join(work_dir, f"{base_name}_words.npz")
+    save_words(words_path, transcript.words)
+
+    # Build markdown transcript
+    md_path = os.path.join(work_dir, f"{base_name}_transcript.md")
+    _build_transcript_md(transcript, md_path, base_name)
+    print(f"  Transcript: {md_path}")
+
+    return {
+        "srt_path": srt_path,
+        "transcript_path": md_path,
+        "utterances_path": utterances_path,
+        "words_path": words_path,
+    }
+
+
+def rebuild_transcripts():
+    """Regenerate the transcript files of every work dir from stored payloads.
+
+    Reads <name>_transcript.json.gz, or the transcript cache for work dirs
+    from before payloads were kept (and saves the payload then). No API
+    calls, no uploads. Returns the number of work dirs rebuilt.
+    """
+    print("\n=== Rebuild transcripts from stored payloads ===")
+    rebuilt = 0
+    for entry in sorted(os.listdir(_TMP_BASE)) if os.path.isdir(_TMP_BASE) else []:
+        work_dir = os.path.join(_TMP_BASE, entry)
+        state = _load_state(work_dir)
+        if state.get("step") not in ("transcribed", "clips_identified", "cut", "uploaded"):
+            continue
+
+        base_name = os.path.splitext(os.path.basename(state["video_path"]))[0]
+        payload_path = os.path.join(work_dir, f"{base_name}_transcript.json.gz")
+        payload = _load_transcript_payload(payload_path)
+        if payload is None:
+            # States from before the flag was recorded may have either entry
+            flags = [state["disfluencies"]] if "disfluencies" in state else [True, False]
+            payload = _transcript_cache_get([
+                key for flag in flags
+                for key in _transcript_cache_keys(state, state.get("audio_path"), flag)
+            ])
+            if payload is None:
+                print(f"  {entry}: no stored transcript — skipped (re-run Step 2)")
+                continue
+            _save_transcript_payload(payload_path, payload)
+
+        print(f"  {entry}:")
+        state.update(_write_transcript_files(work_dir, base_name,
+                                             _transcript_from_payload(payload)))
+        state["transcript_payload_path"] = payload_path
+        _save_state(work_dir, state)
+        rebuilt += 1
+
+    print(f"\n  Rebuilt {rebuilt} transcript(s).")
+    return rebuilt
+
+
+def _assemblyai_config(video_name, disfluencies=False):
+    """Set up the AssemblyAI SDK from the environment; returns the transcription config."""
+    api_key = os.environ.get("ASSEMBLYAI_API_KEY", "")
+    if not api_key:
+        notify_step("error", video_name, "ASSEMBLYAI_API_KEY not set in .env")
+        raise RuntimeError("ASSEMBLYAI_API_KEY not set in .env")
+
+    aai.settings.api_key = api_key
+    if os.environ.get("ASSEMBLYAI_BASE_URL"):
+        # e.g. a local stand-in server for testing
+        aai.settings.base_url = os.environ["ASSEMBLYAI_BASE_URL"]
+
+    notify_step("transcribe_start", video_name, "Uploading audio to AssemblyAI...")
+    return aai.TranscriptionConfig(**_transcribe_options(disfluencies))
+
+
+def _transcribe_audio(work_dir, video_path, audio_path, chunks, video_name,
+                      disfluencies=False):
+    """Transcribe audio_path with AssemblyAI (whole, or as parallel chunks)."""
+    config = _assemblyai_config(video_name, disfluencies)
+    print("  Uploading to AssemblyAI and transcribing (this may take a few minutes)...")
+
+    if chunks > 1:
+        return _transcribe_chunked(work_dir, video_path, audio_path, config, chunks, video_name)
+
+    transcriber = aai.Transcriber()
+    transcript = transcriber.transcribe(audio_path, config=config)
+
+    if transcript.status == aai.TranscriptStatus.error:
+        notify_step("error", video_name, f"Transcription failed: {transcript.error}")
+        raise RuntimeError(f"Transcription failed: {transcript.error}")
+    return transcript
+
+
+def _transcribe_chunked(work_dir, video_path, audio_path, config, chunks, video_name):
+    """Transcribe audio_path as parallel chunks split at silences, then stitch.
+
+    Chunk borders come from the source's silence map (see
+    load_audio_envelope); each chunk overlaps its neighbours so speaker
+    labels can be reconciled (see stitch_chunks). Returns a transcript-like
+    object with .words and .utterances on the full timeline.
+    """
+    envelope = load_audio_envelope(work_dir, video_path, audio_path)
+    if envelope:
+        duration = len(envelope["db"]) * envelope["hop"]
+        silences = envelope["silences"]
+    else:
+        duration, silences = _probe_video(audio_path)["duration"], []
+    plan = plan_chunks(duration, silences, chunks)
+
+    chunk_dir = tempfile.mkdtemp(dir=work_dir, prefix="chunks_")
+    try:
+        paths = []
+        for i, (a_start, a_end, _, _) in enumerate(plan):
+            path = os.path.join(chunk_dir, f"chunk_{i:02d}.mp3")
+            cmd = ["ffmpeg", "-ss", str(a_start), "-t", str(a_end - a_start), "-i", audio_path,
+                   "-c:a", "libmp3lame", "-b:a", "128k", "-y", path]
+            result = _run_ffmpeg(cmd)
+            if result.returncode != 0:
+                raise RuntimeError(f"Audio chunking failed: {result.stderr[-300:]}")
+            paths.append(path)
+
+        borders = ", ".join(_format_time(own_start) for _, _, own_start, _ in plan[1:])
+        print(f"  Transcribing {len(plan)} chunks in parallel (borders at {borders})...")
+        with ThreadPoolExecutor(max_workers=len(plan)) as executor:
+            results = list(executor.map(
+                lambda path: aai.Transcriber().transcribe(path, config=config), paths
+            ))
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    for i, result in enumerate(results):
+        if result.status == aai.TranscriptStatus.error:
+            notify_step("error", video_name, f"Transcription failed (chunk {i}): {result.error}")
+            raise RuntimeError(f"Transcription failed (chunk {i}): {result.error}")
+
+    transcript = stitch_chunks(list(zip(plan, results)))
+    speakers = sorted({u.speaker for u in transcript.utterances})
+    print(f"  Stitched {len(plan)} chunks — speakers: {', '.join(speakers)}")
+    return transcript
+
+
+# ── Step 2 (batch): Transcriptions in Flight ──
+# A day's uploads shouldn't transcribe one at a time. Batch runs drive each
+# video through download → transcription on an asyncio loop: jobs are
+# submitted to AssemblyAI and polled, so while one waits the next downloads
+# and extracts audio. Blocking work (downloads, ffmpeg, SDK upload) runs in
+# threads; --transcribe-jobs caps the transcriptions in flight.
+
+_TRANSCRIBE_JOBS = 3  # default transcriptions in flight (--transcribe-jobs)
+_POLL_INTERVAL = 15  # seconds between status checks of a submitted job
+_POLL_TIMEOUT = 4 * 3600  # seconds before a job that never finishes fails its video
+_POLL_API_ERRORS = 3  # consecutive API error replies before a job fails its video
+
+
+async def _transcribe_async(work_dir, video_path, audio_path, chunks, video_name,
+                            disfluencies=False):
+    """Submit audio_path to AssemblyAI and poll until done, without blocking the loop.
+
+    Polling goes through the SDK (Transcript.get_by_id) in a worker thread.
+    Network errors are retried until _POLL_TIMEOUT; API error replies (bad
+    key, unknown id — the SDK doesn't expose the status code) fail the
+    video after _POLL_API_ERRORS in a row.
+    """
+    if chunks > 1:  # chunks already run in parallel threads; the whole set is one job
+        return await asyncio.to_thread(_transcribe_audio, work_dir, video_path, audio_path,
+                                       chunks, video_name, disfluencies)
+
+    config = await asyncio.to_thread(_assemblyai_config, video_name, disfluencies)
+    aai.settings.polling_interval = _POLL_INTERVAL
+    submitted = await asyncio.to_thread(aai.Transcriber().submit, audio_path, config=config)
+    print(f"  [{video_name}] Submitted to AssemblyAI ({submitted.id})")
+
+    deadline = time.monotonic() + _POLL_TIMEOUT
+    api_errors = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            transcript = await asyncio.wait_for(
+                asyncio.to_thread(aai.Transcript.get_by_id, submitted.id), max(remaining, 0)
+            )
+        except asyncio.TimeoutError:
+            notify_step("error", video_name, f"Transcription timed out ({submitted.id})")
+            raise RuntimeError(f"Transcription not finished after {_POLL_TIMEOUT // 3600} h "
+                               f"({submitted.id})")
+        except aai.types.TranscriptError as e:
+            api_errors += 1
+            if api_errors >= _POLL_API_ERRORS:
+                notify_step("error", video_name, f"Transcript status check failed: {e}")
+                raise RuntimeError(f"Transcript status check failed: {e}")
+            print(f"  [{video_name}] Status check failed ({e}), retrying")
+        except httpx.TransportError as e:
+            print(f"  [{video_name}] Status check failed ({e}), retrying")
+        else:
+            api_errors = 0
+            if transcript.status == aai.TranscriptStatus.completed:
+                return transcript
+            if transcript.status == aai.TranscriptStatus.error:
+                notify_step("error", video_name, f"Transcription failed: {transcript.error}")
+                raise RuntimeError(f"Transcription failed: {transcript.error}")
+        await asyncio.sleep(_POLL_INTERVAL)
+
+
+async def step_transcribe_async(work_dir, state, slots, chunks=1, disfluencies=False):
+    """step_transcribe for batch runs: the API wait is awaited, not blocked on.
+
+    slots is an asyncio.Semaphore capping the transcriptions in flight.
+    """
+    video_name = state.get("video_name", "Unknown")
+    print(f"\n=== Step 2: Transcribe via AssemblyAI ({video_name}) ===")
+
+    if state.get("step") in ("transcribed", "clips_identified", "cut", "uploaded"):
+        print(f"  [{video_name}] Already transcribed. SRT: {state.get('srt_path')}")
+        return state
+
+    audio_path, cache_keys, transcript = await asyncio.to_thread(
+        _prepare_transcription, work_dir, state, disfluencies
+    )
+    if transcript is None:
+        async with slots:
+            transcript = await _transcribe_async(work_dir, state["video_path"], audio_path,
+                                                 chunks, video_name, disfluencies)
+        await asyncio.to_thread(_transcript_cache_put, cache_keys,
+                                _transcript_payload(transcript))
+
+    return await asyncio.to_thread(_finish_transcription, work_dir, state, transcript,
+                                   audio_path, disfluencies)
+
+
+def run_batch(urls, jobs=_TRANSCRIBE_JOBS, chunks=1, stream_audio=False, mezzanine=None,
+              disfluencies=False):
+    """Download and transcribe several Drive videos, up to jobs transcriptions at once.
+
+    Downloads run one at a time (they share the link); everything after
+    overlaps. A failed video is reported and doesn't stop the others.
+    """
+    async def _one(url, download_lock, slots):
+        async with download_lock:
+            work_dir, state = await asyncio.to_thread(step_download, url, stream_audio)
+        if mezzanine:
+            state = await asyncio.to_thread(step_mezzanine, work_dir, state,
+                                            mezzanine == "force")
+        return await step_transcribe_async(work_dir, state, slots, chunks=chunks,
+                                           disfluencies=disfluencies)
+
+    async def _all():
+        download_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(jobs)
+        return await asyncio.gather(*(_one(url, download_lock, slots) for url in urls),
+                                    return_exceptions=True)
+
+    print(f"\n=== Batch: {len(urls)} videos, up to {jobs} transcriptions in flight ===")
+    results = asyncio.run(_all())
+
+    print("\n=== Batch Summary ===")
+    failed = 0
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"  FAILED  {url}: {result}")
+        else:
+            print(f"  OK      {result.get('video_name')} → {result.get('transcript_path')}")
+    print(f"\n  {len(urls) - failed}/{len(urls)} transcribed. Run /clip on each to identify clips.")
+    return failed == 0
+
+
 def _build_srt(transcript, srt_path):
     """Build SRT file from AssemblyAI transcript utterances."""
     with open(srt_path, "w") as f:
@@ -340,6 +1011,53 @@ def _build_srt(transcript, srt_path):
             f.write(f"[Speaker {speaker}] {utterance.text}\n\n")
 
 
+def _build_utterances_json(transcript, path):
+    """Save the diarized utterance timeline (speaker, start/end seconds, text)."""
+    utterances = [
+        {
+            "speaker": u.speaker or "?",
+            "start": u.start / 1000.0,
+            "end": u.end / 1000.0,
+            "text": u.text,
+        }
+        for u in transcript.utterances
+    ]
+    with open(path, "w") as f:
+        json.dump({"utterances": utterances}, f)
+
+
+_SRT_BLOCK = re.compile(
+    r"(\d+):(\d+):(\d+),(\d+) --> (\d+):(\d+):(\d+),(\d+)\n\[Speaker ([^\]]+)\] (.*)"
+)
+
+
+def _load_utterances(work_dir, state):
+    """Load the utterance timeline, falling back to parsing the SRT.
+
+    Work dirs transcribed before utterances were persisted still have the
+    SRT, whose blocks carry the same speaker + timing information.
+    """
+    path = state.get("utterances_path")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)["utterances"]
+
+    srt_path = state.get("srt_path")
+    if not srt_path or not os.path.exists(srt_path):
+        return []
+    with open(srt_path) as f:
+        text = f.read()
+
+    def _sec(h, m, s, ms):
+        return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
+
+    return [
+        {"speaker": m.group(9), "start": _sec(*m.group(1, 2, 3, 4)),
+         "end": _sec(*m.group(5, 6, 7, 8)), "text": m.group(10)}
+        for m in _SRT_BLOCK.finditer(text)
+    ]
+
+
 def _build_transcript_md(transcript, md_path, title):
     """Build a readable markdown transcript with speaker labels and timestamps."""
     with open(md_path, "w") as f:
@@ -379,88 +1097,1233 @@ def _load_clips(work_dir):
     )
 
 
+def _align_clips_to_words(state, clips, clips_path):
+    """Snap clip boundaries to the word timings (clipping_agent_skills.md §8).
+
+    Starts go 0.5–1 s before the first word, ends 0.5 s after the last one,
+    all clips in one vectorized lookup. Prints how far each boundary moved
+    and writes the corrected times back to the clips JSON (the original is
+    kept once as *_clips.orig.json). Returns the clips, updated in place.
+    """
+    words = load_words(state.get("words_path"))
+    if words is None or not clips:
+        return clips
+
+    starts, ends, tight_s, tight_e = snap_clips_to_words(
+        words, [c["start_time"] for c in clips], [c["end_time"] for c in clips]
+    )
+    moved = 0
+    for clip, start, end, ts, te in zip(clips, starts, ends, tight_s, tight_e):
+        start, end = round(float(start), 2), round(float(end), 2)  # already on a 10 ms grid
+        d_start, d_end = start - clip["start_time"], end - clip["end_time"]
+        if abs(d_start) < 0.01 and abs(d_end) < 0.01:
+            continue
+        moved += 1
+        notes = [n for n, flag in (("tight start", ts), ("tight end", te)) if flag]
+        print(f"    #{clip['id']}: start {d_start:+.2f}s, end {d_end:+.2f}s"
+              + (f" ({', '.join(notes)})" if notes else ""))
+        clip["start_time"], clip["end_time"] = start, end
+
+    print(f"  Word boundaries: {moved}/{len(clips)} clips adjusted")
+    if moved:
+        backup = clips_path[:-len(".json")] + ".orig.json"
+        if not os.path.exists(backup):
+            shutil.copyfile(clips_path, backup)
+        with open(clips_path) as f:
+            data = json.load(f)
+        data["clips"] = clips
+        with open(clips_path, "w") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    return clips
+
+
+# ── Step 3b: Review Thumbnails (optional) ────────────────────────────────
+# A cover frame and a contact sheet per clip, all grabbed in ONE pass over
+# the source, so clips can be reviewed before anything is rendered.
+
+_SHEET_COLS = 3
+_SHEET_ROWS = 3
+_COVER_OFFSET = 1.0  # seconds into the clip — past the breath before the hook
+_THUMB_HEIGHT = 720
+_SHEET_TILE_WIDTH = 320
+
+
+def _thumbnail_times(clip):
+    """Return (cover time, [contact sheet times]) for a clip, in source seconds."""
+    start, end = clip["start_time"], clip["end_time"]
+    duration = end - start
+    n = _SHEET_COLS * _SHEET_ROWS
+    cover = start + min(_COVER_OFFSET, duration / 2)
+    return cover, [start + duration * (i + 0.5) / n for i in range(n)]
+
+
+def _extract_frames(video_path, times, out_dir, keyframes=None):
+    """Grab the frame at each time with ONE sequential decode of the source.
+
+    A single select filter matches every requested time (the first frame at
+    or after it), so the source is read once from the keyframe before the
+    earliest time to the latest. If that yields a different number of
+    frames than times (VFR gaps can merge two matches), frames can't be
+    paired by order, so each time is grabbed with its own exact seek
+    instead. Returns a list of JPEG paths aligned with times (None where no
+    frame came out), or None if ffmpeg failed.
+    """
+    fps = _probe_video(video_path)["fps"] or 25.0
+    # One select match = one frame, so collapse times that land on the same frame
+    grid = sorted({round(t * fps) for t in times})
+    pre_seek = _seek_point(keyframes, grid[0] / fps)
+    edges = [(i - 0.5) / fps - pre_seek for i in grid]
+    select = "+".join(
+        f"gte(t,{e:.4f})*(lt(prev_t,{e:.4f})+isnan(prev_t))" for e in edges
+    )
+    span = grid[-1] / fps - pre_seek + 1.0
+
+    cmd = [
+        "ffmpeg",
+        "-ss", str(pre_seek),
+        "-t", f"{span:.3f}",
+        "-i", video_path,
+        "-an",
+        "-vf", f"select='{select}',scale=-2:'min({_THUMB_HEIGHT},ih)'",
+        "-vsync", "passthrough",
+        "-q:v", "3",
+        "-y", os.path.join(out_dir, "frame_%04d.jpg"),
+    ]
+    result = _run_ffmpeg(cmd, duration=span)
+    if result.returncode != 0:
+        print(f"    ERROR (thumbnails): {result.stderr[-300:]}")
+        return None
+
+    written = sorted(f for f in os.listdir(out_dir) if f.startswith("frame_"))
+    if len(written) == len(grid):
+        by_frame = {i: os.path.join(out_dir, f) for i, f in zip(grid, written)}
+    else:
+        print(f"    {len(written)} frames for {len(grid)} timestamps (VFR source?) — "
+              f"grabbing each frame separately")
+        for f in written:
+            os.remove(os.path.join(out_dir, f))
+        by_frame = {}
+        for i in grid:
+            path = os.path.join(out_dir, f"seek_{i:08d}.jpg")
+            cmd = [
+                "ffmpeg", "-ss", f"{i / fps:.4f}", "-i", video_path, "-an", "-frames:v", "1",
+                "-vf", f"scale=-2:'min({_THUMB_HEIGHT},ih)'", "-q:v", "3", "-y", path,
+            ]
+            if _run_ffmpeg(cmd).returncode == 0 and os.path.exists(path):
+                by_frame[i] = path
+    return [by_frame.get(round(t * fps)) for t in times]
+
+
+def _contact_sheet(frames, out_path):
+    """Tile frames (row-major, _SHEET_COLS × _SHEET_ROWS) into one JPEG."""
+    graph = [f"[{i}:v]scale={_SHEET_TILE_WIDTH}:-2,setsar=1[t{i}]" for i in range(len(frames))]
+    for r in range(_SHEET_ROWS):
+        tiles = "".join(f"[t{r * _SHEET_COLS + c}]" for c in range(_SHEET_COLS))
+        graph.append(f"{tiles}hstack=inputs={_SHEET_COLS}[r{r}]")
+    graph.append("".join(f"[r{r}]" for r in range(_SHEET_ROWS))
+                 + f"vstack=inputs={_SHEET_ROWS}")
+
+    cmd = ["ffmpeg"]
+    for frame in frames:
+        cmd += ["-i", frame]
+    cmd += ["-filter_complex", ";".join(graph), "-frames:v", "1", "-q:v", "3", "-y", out_path]
+    result = _run_ffmpeg(cmd)
+    if result.returncode != 0:
+        print(f"    ERROR (contact sheet): {result.stderr[-200:]}")
+        return False
+    return True
+
+
+def step_thumbnails(work_dir, state):
+    """Build a cover frame + contact sheet per clip and send them to Telegram."""
+    print("\n=== Step 3b: Review Thumbnails ===")
+
+    video_name = state.get("video_name", "Unknown")
+    clips, _ = _load_clips(work_dir)
+    if not clips:
+        print("  No clips found.")
+        return state
+    clips = sorted(clips, key=lambda c: c["id"])
+
+    video_path = _cut_source(state)
+    thumb_dir = os.path.join(work_dir, "thumbnails")
+    os.makedirs(thumb_dir, exist_ok=True)
+
+    plan = [(clip,) + _thumbnail_times(clip) for clip in clips]
+    times = [t for _, cover, sheet in plan for t in [cover] + sheet]
+    print(f"  {len(clips)} clips → {len(times)} frames in one pass")
+
+    keyframes = _load_keyframe_index(work_dir, video_path)
+    frame_dir = tempfile.mkdtemp(dir=thumb_dir)
+    photos = []
+    try:
+        frames = _extract_frames(video_path, times, frame_dir, keyframes)
+        if frames is None:
+            notify_step("error", video_name, "Thumbnail extraction failed")
+            return state
+
+        per_clip = 1 + _SHEET_COLS * _SHEET_ROWS
+        for n, (clip, _, _) in enumerate(plan):
+            cover_frame, *sheet_frames = frames[n * per_clip:(n + 1) * per_clip]
+            stem = os.path.splitext(os.path.basename(_clip_paths(clip, thumb_dir)[0]))[0]
+            start_fmt = _format_time(clip["start_time"])
+            end_fmt = _format_time(clip["end_time"])
+            caption = (
+                f"<b>#{clip['id']}</b> [{clip.get('virality_score', '?')}/10] "
+                f"{clip.get('title', 'Untitled')}\n"
+                f"{start_fmt}–{end_fmt} ({clip['end_time'] - clip['start_time']:.0f}s) | "
+                f"{clip.get('reel_type', '?')}"
+            )
+            if cover_frame:
+                cover_path = os.path.join(thumb_dir, f"{stem}_cover.jpg")
+                shutil.copyfile(cover_frame, cover_path)
+                photos.append((cover_path, caption))
+                caption = None
+            if all(sheet_frames):
+                sheet_path = os.path.join(thumb_dir, f"{stem}_sheet.jpg")
+                if _contact_sheet(sheet_frames, sheet_path):
+                    photos.append((sheet_path, caption))
+    finally:
+        shutil.rmtree(frame_dir, ignore_errors=True)
+
+    print(f"  {len(photos)} images in {thumb_dir}")
+    if photos:
+        notify_step("thumbnails", video_name, f"{len(clips)} clips — cover + contact sheet each")
+        send_media_group(photos)
+    return state
+
+
 # ── Step 4: FFmpeg Cutting ────────────────────────────────────────────────
 
-def _cut_clip(video_path, clip, output_dir, skip_vertical=False):
-    """Cut a single clip — horizontal and optionally vertical versions.
+# ── Encode Profiles ──
+# Named encoder settings live in encode_profiles.json; "defaults" maps each
+# rendition role (master / vertical / telegram) to a profile. --profile
+# ROLE=NAME overrides a role for one run.
+
+_PROFILES_PATH = os.path.join(_REPO_ROOT, "encode_profiles.json")
+_PROFILE_ROLES = ("master", "vertical", "telegram")
+_ACTIVE_PROFILES = {}
+
+
+def _load_profiles(path=_PROFILES_PATH):
+    """Load encode_profiles.json. Returns (role defaults, {name: profile})."""
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("defaults", {}), data["profiles"]
+
+
+def _select_profiles(overrides=None, path=_PROFILES_PATH):
+    """Resolve the profile for every rendition role. overrides: {role: profile name}."""
+    defaults, profiles = _load_profiles(path)
+    chosen = dict(defaults, **(overrides or {}))
+    for role in _PROFILE_ROLES:
+        name = chosen.get(role, role)
+        if name not in profiles:
+            raise ValueError(f"Unknown encode profile '{name}' for {role} "
+                             f"(available: {', '.join(sorted(profiles))})")
+        _ACTIVE_PROFILES[role] = dict(profiles[name], name=name)
+    return _ACTIVE_PROFILES
 
-    Uses two-pass seeking for frame-accurate cuts:
-    - First -ss seeks roughly (fast, keyframe-based)
-    - Second -ss refines from that point (accurate)
+
+def _role_profile(role):
+    """Return the active encode profile for a rendition role."""
+    if not _ACTIVE_PROFILES:
+        _select_profiles()
+    return _ACTIVE_PROFILES[role]
+
+
+def _video_args(profile, threads=None):
+    """ffmpeg video codec args for an encode profile.
+
+    A thread count in the profile wins over the scheduler's budget.
     """
-    clip_id = clip["id"]
-    title_slug = _slugify(clip.get("title", f"clip_{clip_id:02d}"))
-    base_name = f"clip_{clip_id:02d}_{title_slug}"
+    args = ["-c:v", profile["codec"]]
+    if profile.get("preset"):
+        args += ["-preset", profile["preset"]]
+    if profile.get("tune"):
+        args += ["-tune", profile["tune"]]
+    if profile.get("crf") is not None:
+        args += ["-crf", str(profile["crf"])]
+    elif profile.get("bitrate"):
+        args += ["-b:v", profile["bitrate"]]
+    threads = profile.get("threads") or threads
+    if threads:
+        args += ["-threads", str(threads)]
+    args += profile.get("extra", [])
+    return args
+
+
+def _audio_args(profile):
+    """ffmpeg audio codec args for an encode profile."""
+    args = ["-c:a", profile.get("audio_codec", "aac")]
+    if profile.get("audio_bitrate"):
+        args += ["-b:a", profile["audio_bitrate"]]
+    return args
+
+
+def _encode_args(profile, threads=None):
+    """ffmpeg video + audio codec args for an encode profile."""
+    return _video_args(profile, threads) + _audio_args(profile)
+
+
+def _profile_arg(value):
+    """argparse type for --profile: ROLE=NAME."""
+    role, sep, name = value.partition("=")
+    if not sep or role not in _PROFILE_ROLES or not name:
+        raise argparse.ArgumentTypeError(
+            f"expected ROLE=NAME with ROLE one of {', '.join(_PROFILE_ROLES)}, got {value!r}")
+    return role, name
+
+
+_PROBE_CACHE = {}
+
+
+def _parse_rate(rate):
+    """Parse an ffprobe rational like '30000/1001' into a float (None if invalid)."""
+    num, _, den = (rate or "0/0").partition("/")
+    try:
+        return float(num) / float(den) if float(den) else None
+    except ValueError:
+        return None
 
-    start = clip["start_time"]
-    end = clip["end_time"]
-    duration = end - start
 
-    # Seek 2 seconds early for keyframe alignment, then refine
-    pre_seek = max(0, start - 2)
-    fine_seek = start - pre_seek
+def _probe_video(video_path):
+    """Probe the first video stream of a file with ffprobe.
 
-    horiz_path = os.path.join(output_dir, f"{base_name}.mp4")
-    vert_path = os.path.join(output_dir, f"{base_name}_vertical.mp4")
+    Returns a dict with width, height, codec, profile, pix_fmt, fps, vfr,
+    duration, start_time and has_audio. vfr is True when the average frame
+    rate differs from the stream's base rate (variable frame rate). Values
+    are None (has_audio False) when the probe fails.
+    Results are cached per path — sources don't change during a run.
+    """
+    if video_path in _PROBE_CACHE:
+        return _PROBE_CACHE[video_path]
+
+    info = {
+        "width": None, "height": None, "codec": None, "profile": None, "pix_fmt": None,
+        "fps": None, "vfr": False, "duration": None, "start_time": 0.0, "has_audio": False,
+    }
+    probe = subprocess.run(
+        ["ffprobe", "-v", "error",
+         "-show_entries", "stream=codec_type,codec_name,profile,width,height,pix_fmt,avg_frame_rate,r_frame_rate"
+                          ":format=duration,start_time",
+         "-of", "json", video_path],
+        capture_output=True, text=True,
+    )
+    try:
+        data = json.loads(probe.stdout)
+    except (ValueError, TypeError):
+        return info
+
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            info["has_audio"] = True
+        elif stream.get("codec_type") == "video" and info["codec"] is None:
+            info["width"] = stream.get("width")
+            info["height"] = stream.get("height")
+            info["codec"] = stream.get("codec_name")
+            info["profile"] = stream.get("profile")
+            info["pix_fmt"] = stream.get("pix_fmt")
+            avg = _parse_rate(stream.get("avg_frame_rate"))
+            base = _parse_rate(stream.get("r_frame_rate"))
+            info["fps"] = avg
+            info["vfr"] = bool(avg and base and abs(avg - base) / base > 0.01)
+    fmt = data.get("format", {})
+    try:
+        info["duration"] = float(fmt.get("duration"))
+    except (TypeError, ValueError):
+        pass
+    try:
+        info["start_time"] = float(fmt.get("start_time"))
+    except (TypeError, ValueError):
+        pass
+
+    _PROBE_CACHE[video_path] = info
+    return info
+
+
+def _vertical_crop(clip, crop_path=None, tag=""):
+    """Return the 9:16 crop filter for a clip.
+
+    Priority: the clip's crop_x, then crop_path — a callable (start, end) ->
+    (initial x, [(clip time, x), ...]) whose moves are applied with sendcmd
+    inside the same encode — then a static center crop. The crop instance
+    is named per clip and rendition (tag) so its sendcmd never steers
+    another crop in a shared graph.
+    """
+    crop_x = clip.get("crop_x")
+    if crop_x is not None:
+        return f"crop=ih*9/16:ih:{crop_x}:0"
+    if crop_path is not None:
+        x0, moves = crop_path(clip["start_time"], clip["end_time"])
+        if clip.get("keep"):
+            moves = [(_output_time(clip, clip["start_time"] + t), x) for t, x in moves]
+        if not moves:
+            return f"crop=ih*9/16:ih:{x0}:0"
+        name = f"crop@rf{clip['id']}{tag}"
+        cmds = ";".join(f"{t:.3f} {name} x {x}" for t, x in moves)
+        return f"sendcmd=c='{cmds}',{name}=ih*9/16:ih:{x0}:0"
+    return "crop=ih*9/16:ih:(iw-ih*9/16)/2:0"
+
+
+def _probe_keyframes(video_path, start=None, end=None):
+    """List keyframe timestamps (seconds) of the first video stream.
+
+    Reads packet flags only — no decoding. start/end limit the scan to a
+    window of the file. Timestamps are relative to the container start (the
+    same timeline -ss uses). Returns a sorted list (empty if the probe fails).
+    """
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0"]
+    if start is not None or end is not None:
+        window = f"{start if start is not None else ''}%{end if end is not None else ''}"
+        cmd += ["-read_intervals", window]
+    probe = subprocess.run(cmd + [video_path], capture_output=True, text=True)
+
+    offset = _probe_video(video_path)["start_time"]
+    keyframes = []
+    for line in probe.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                keyframes.append(round(float(pts) - offset, 6))
+            except ValueError:
+                continue
+    return sorted(keyframes)
+
+
+def _load_keyframe_index(work_dir, video_path):
+    """Load the keyframe index for a source, building it on first use.
+
+    Stored as keyframes_<source name>.json next to state.json, one per
+    source so the original and its mezzanine each keep their index. Stamped
+    with size and mtime so a replaced file gets re-indexed. Returns a sorted
+    list of keyframe times (empty if the source couldn't be probed).
+    """
+    index_path = os.path.join(work_dir, f"keyframes_{os.path.basename(video_path)}.json")
+    st = os.stat(video_path)
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if (index.get("source") == os.path.basename(video_path)
+                and index.get("size") == st.st_size and index.get("mtime") == st.st_mtime):
+            return index["keyframes"]
+
+    print("  Indexing keyframes (once per source)...")
+    t0 = time.time()
+    keyframes = _probe_keyframes(video_path)
+    if keyframes:
+        with open(index_path, "w") as f:
+            json.dump({"source": os.path.basename(video_path), "size": st.st_size,
+                       "mtime": st.st_mtime, "keyframes": keyframes}, f)
+    print(f"  Keyframe index: {len(keyframes)} keyframes ({time.time() - t0:.1f}s)")
+    return keyframes
+
+
+def _seek_point(keyframes, t):
+    """Return the last keyframe at or before t (falls back to t - 2s without an index)."""
+    if not keyframes:
+        return max(0, t - 2)
+    i = bisect.bisect_right(keyframes, t) - 1
+    return keyframes[i] if i >= 0 else 0
+
+
+# Source profiles libx264 can re-encode the GOP edges to without breaking
+# the stream-copied middle (same codec, profile and pixel format)
+_SMART_CUT_PROFILES = {"constrained baseline": "baseline", "baseline": "baseline",
+                       "main": "main", "high": "high"}
+_SMART_CUT_MIN_COPY = 2.0  # seconds — below this a full re-encode is just as fast
+
+
+def _smart_cut(video_path, start, end, out_path, keyframes=None, threads=None,
+               audio_filter=None):
+    """Cut [start, end) re-encoding only the partial GOPs at the edges.
+
+    head (start → first keyframe) and tail (last keyframe → end) are encoded
+    with libx264 matching the source profile, the middle is stream-copied,
+    and the three pieces are joined with the concat demuxer. The pieces are
+    MPEG-TS in Annex B form so each carries its own SPS/PPS in-band — the
+    re-encoded edges never share the source's parameter sets, and an MP4
+    concat would keep only the first piece's. The joined master is decoded
+    once as a check. Audio is re-encoded over the whole range (cheap, and
+    AAC frames don't line up with video keyframes anyway).
+
+    keyframes is the source's keyframe index; without it the clip window is
+    probed directly. audio_filter (e.g. a loudness gain) goes on the audio.
+
+    Returns True on success, False if the source isn't safe to copy from —
+    the caller then falls back to a full re-encode.
+    """
+    source = _probe_video(video_path)
+    master = _role_profile("master")
+    profile = _SMART_CUT_PROFILES.get((source["profile"] or "").lower())
+    if master["codec"] != "libx264":
+        print(f"    Smart cut: master profile '{master['name']}' isn't H.264, re-encoding")
+        return False
+    if source["codec"] != "h264" or profile is None \
+            or source["pix_fmt"] not in ("yuv420p", "yuvj420p") or not source["fps"]:
+        print(f"    Smart cut: source not copy-safe "
+              f"({source['codec']}/{source['profile']}/{source['pix_fmt']}), re-encoding")
+        return False
+
+    if keyframes:
+        inner = keyframes[bisect.bisect_left(keyframes, start):bisect.bisect_right(keyframes, end)]
+    else:
+        window = _probe_keyframes(video_path, max(0, start - 1), end + 1)
+        inner = [k for k in window if start <= k <= end]
+    if len(inner) < 2 or inner[-1] - inner[0] < _SMART_CUT_MIN_COPY:
+        print(f"    Smart cut: no copyable GOPs in range, re-encoding")
+        return False
+    k_in, k_out = inner[0], inner[-1]
+
+    # Master profile's video settings, pinned to the source's H.264 profile
+    encode = ["-an"] + _video_args(master, threads) + [
+        "-profile:v", profile, "-pix_fmt", source["pix_fmt"], "-r", f"{source['fps']:.6f}",
+    ]
+    annexb = ["-bsf:v", "h264_mp4toannexb", "-f", "mpegts"]
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(out_path)) as tmp:
+        pieces = []
+        # (piece start, piece duration, codec args)
+        plan = [
+            (start, k_in - start, encode),
+            (k_in, k_out - k_in, ["-an", "-c:v", "copy"]),
+            (k_out, end - k_out, encode),
+        ]
+        for i, (p_start, p_dur, codec_args) in enumerate(plan):
+            if p_dur <= 0:
+                continue
+            piece = os.path.join(tmp, f"piece_{i}.ts")
+            cmd = ["ffmpeg", "-ss", str(p_start), "-i", video_path,
+                   "-t", str(p_dur)] + codec_args + annexb + ["-y", piece]
+            result = _run_ffmpeg(cmd)
+            if result.returncode != 0:
+                print(f"    Smart cut: piece {i} failed, re-encoding: {result.stderr[-200:]}")
+                return False
+            pieces.append(piece)
+
+        list_path = os.path.join(tmp, "pieces.txt")
+        with open(list_path, "w") as f:
+            for piece in pieces:
+                f.write(f"file '{piece}'\n")
 
-    # Horizontal cut (source resolution, high quality for Drive)
-    if not os.path.exists(horiz_path):
-        cmd_h = [
+        cmd = [
             "ffmpeg",
-            "-ss", str(pre_seek),
-            "-i", video_path,
-            "-ss", str(fine_seek),
-            "-t", str(duration),
-            "-c:v", "libx264", "-c:a", "aac",
-            "-crf", "18",
-            "-avoid_negative_ts", "make_zero",
-            "-y", horiz_path,
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-ss", str(start), "-t", str(end - start), "-i", video_path,
+            "-map", "0:v", "-map", "1:a?",
+            "-c:v", "copy",
+        ] + (["-af", audio_filter] if audio_filter else []) + _audio_args(master) + [
+            "-movflags", "+faststart",
+            "-y", out_path,
         ]
-        result = subprocess.run(cmd_h, capture_output=True, text=True)
+        result = _run_ffmpeg(cmd)
         if result.returncode != 0:
-            print(f"    ERROR (horizontal): {result.stderr[-300:]}")
-            return None, None
+            print(f"    Smart cut: concat failed, re-encoding: {result.stderr[-200:]}")
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            return False
+
+    # Any decode error at a join means the pieces didn't splice cleanly
+    check = _run_ffmpeg(["ffmpeg", "-v", "error", "-i", out_path, "-map", "0:v", "-f", "null", "-"])
+    if check.returncode != 0 or check.stderr.strip():
+        print(f"    Smart cut: output doesn't decode cleanly, re-encoding: {check.stderr[-200:]}")
+        os.remove(out_path)
+        return False
+
+    copied = k_out - k_in
+    print(f"    Smart cut: copied {copied:.1f}s of {end - start:.1f}s")
+    return True
+
+
+# libx264 stops scaling well past ~4 frame threads per 1080p encode, so
+# auto mode runs more jobs with fewer threads each rather than the reverse
+_THREADS_PER_JOB = 4
+
+
+def _plan_workers(workers, n_jobs):
+    """Size the cut pool to the machine. Returns (workers, threads per job).
+
+    workers is an int or "auto". auto gives each ffmpeg _THREADS_PER_JOB
+    threads and runs as many jobs as the cores allow; a fixed worker count
+    splits the cores evenly between jobs. Either way the total thread budget
+    stays at os.cpu_count() instead of every libx264 grabbing all cores.
+    """
+    cores = os.cpu_count() or 4
+    if workers == "auto":
+        workers = max(1, cores // _THREADS_PER_JOB)
+    workers = max(1, min(int(workers), n_jobs))
+    return workers, max(1, cores // workers)
+
+
+# Rough libx264 throughput (source pixels/s per encoder thread) used to turn
+# cost-model units into wall-clock estimates
+_PIXELS_PER_THREAD_SEC = 15e6
+
+
+def _clip_cost(clip, source, skip_vertical=False):
+    """Cost-model units for one clip: duration × renditions × source pixel rate."""
+    duration = clip["end_time"] - clip["start_time"]
+    renditions = 1 if skip_vertical else 2
+    pixel_rate = (source["width"] or 1920) * (source["height"] or 1080) * (source["fps"] or 30)
+    return duration * renditions * pixel_rate
+
+
+def _estimate_makespan(costs, workers, threads):
+    """Estimated wall-clock seconds to run jobs of the given costs on the pool.
+
+    Simulates longest-job-first list scheduling: each job (in descending
+    cost order) goes to whichever worker frees up first.
+    """
+    rate = threads * _PIXELS_PER_THREAD_SEC
+    loads = [0.0] * workers
+    for cost in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + cost / rate)
+    return max(loads)
+
+
+def _workers_arg(value):
+    """argparse type for --workers: a positive int or 'auto'."""
+    if value == "auto":
+        return value
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError("--workers must be at least 1")
+    return n
+
+
+# ── Render Cache ──
+# Rendered outputs are stored content-addressed under .tmp/render_cache/,
+# keyed by everything that determines their pixels. Outputs in clips/ are
+# hardlinks into the cache, so a retitled clip is relinked instead of
+# re-rendered and a clip whose times changed can never reuse a stale file.
+
+_RENDER_CACHE_DIR = os.path.join(_TMP_BASE, "render_cache")
+_RENDER_CACHE_VERSION = 1  # bump when encoder settings change outside the key
+_RENDER_CACHE_GB = 50  # default size quota (--cache-gb)
+
+
+def _source_fingerprint(video_path):
+    """Cheap content fingerprint: size + SHA-256 of the first and last MiB."""
+    size = os.path.getsize(video_path)
+    h = hashlib.sha256(str(size).encode())
+    with open(video_path, "rb") as f:
+        h.update(f.read(1 << 20))
+        if size > 2 << 20:
+            f.seek(-(1 << 20), os.SEEK_END)
+            h.update(f.read(1 << 20))
+    return h.hexdigest()[:16]
+
+
+def _open_render_cache(video_path, max_gb):
+    """Return the render cache handle for a source, or None if caching is off (max_gb <= 0)."""
+    if not max_gb or max_gb <= 0:
+        return None
+    os.makedirs(_RENDER_CACHE_DIR, exist_ok=True)
+    return {
+        "dir": _RENDER_CACHE_DIR,
+        "source": _source_fingerprint(video_path),
+        "max_bytes": int(max_gb * 1024 ** 3),
+    }
+
+
+def _cache_key(cache, clip, vf, profile):
+    """Hash of (source, start, end, filter graph, encoder settings) for one rendition."""
+    settings = {k: v for k, v in profile.items() if k not in ("name", "description", "threads")}
+    spec = [
+        _RENDER_CACHE_VERSION, cache["source"],
+        round(clip["start_time"], 3), round(clip["end_time"], 3),
+        vf, settings,
+    ]
+    if clip.get("keep"):
+        spec.append(clip["keep"])
+    if clip.get("gain_db"):
+        spec.append(clip["gain_db"])
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, copying when the filesystem can't link."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _cache_fetch(cache, key, out_path):
+    """Put the cached rendition for key at out_path. Returns False on a miss."""
+    entry = os.path.join(cache["dir"], f"{key}.mp4")
+    if not os.path.exists(entry):
+        return False
+    os.utime(entry)  # LRU: mtime is the last-used time
+    if os.path.exists(out_path):
+        if os.path.samefile(entry, out_path):
+            return True
+        os.remove(out_path)
+    _link_or_copy(entry, out_path)
+    return True
+
+
+def _cache_store(cache, key, path):
+    """Add a rendered output to the cache under key."""
+    entry = os.path.join(cache["dir"], f"{key}.mp4")
+    if not os.path.exists(entry):
+        _link_or_copy(path, entry)
+
+
+def _cache_evict(cache):
+    """Drop least-recently-used entries until the cache fits its size quota.
+
+    Entries still hardlinked from a clips/ dir (st_nlink > 1) are neither
+    counted nor evicted — removing them would free no disk.
+    """
+    if cache is None:
+        return
+    entries = []
+    for name in os.listdir(cache["dir"]):
+        path = os.path.join(cache["dir"], name)
+        st = os.stat(path)
+        if st.st_nlink == 1:
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= cache["max_bytes"]:
+            break
+        os.remove(path)
+        total -= size
+        evicted += 1
+    if evicted:
+        print(f"  Render cache: evicted {evicted} entries ({total / 1024 ** 3:.1f} GB kept)")
+
+
+def _prune_stale_outputs(output_dir, tg_dir, clip_bases):
+    """Remove clip_*.mp4 files of clips no longer in the clips JSON (renamed or dropped).
+
+    They'd otherwise be uploaded next to their replacements. clip_bases are
+    the current clip_NN_<slug> names; renditions of a current clip that this
+    run didn't render (e.g. verticals under --no-vertical) are kept.
+    Anything worth keeping is still in the render cache.
+    """
+    for d in (output_dir, tg_dir):
+        if not os.path.isdir(d):
+            continue
+        for name in os.listdir(d):
+            path = os.path.join(d, name)
+            base = name[:-len(".mp4")]
+            if base.endswith("_vertical"):
+                base = base[:-len("_vertical")]
+            if name.startswith("clip_") and name.endswith(".mp4") and base not in clip_bases:
+                os.remove(path)
+                print(f"  Removed stale output: {os.path.relpath(path, output_dir)}")
+
+
+def _clip_paths(clip, output_dir, skip_vertical=False):
+    """Return (horizontal path, vertical path or None) for a clip's outputs."""
+    clip_id = clip["id"]
+    title_slug = _slugify(clip.get("title", f"clip_{clip_id:02d}"))
+    base_name = f"clip_{clip_id:02d}_{title_slug}"
+    horiz_path = os.path.join(output_dir, f"{base_name}.mp4")
+    vert_path = None if skip_vertical else os.path.join(output_dir, f"{base_name}_vertical.mp4")
+    return horiz_path, vert_path
+
+
+def _pending_renditions(clip, horiz_path, vert_path, source, telegram_dir=None, cache=None,
+                        smart_master=False, crop_path=None, captions=None):
+    """List (output path, video filter chain, encode profile, cache key) for every rendition to render.
+
+    - master:   source resolution (for Drive)
+    - vertical: 9:16 crop scaled to 1080x1920
+    - telegram: 720p copies of both (only when telegram_dir is given)
+    Each role is encoded with its active profile (see _role_profile).
+    captions (see _caption_track) burns subtitles into the vertical ones.
+
+    With a render cache, renditions whose key is already cached are linked
+    into place instead (an existing file with a stale spec gets replaced).
+    Without one, any existing output is trusted and skipped.
+    """
+    src_height = source["height"] or 9999  # Assume large if probe fails
+    tg_scale = "scale=-2:720" if src_height > 720 else "null"
+    ass_path = captions(clip) if captions is not None and vert_path else None
+    subs = f",subtitles=filename='{_filter_path(ass_path)}'" if ass_path else ""
+
+    master, vertical, telegram = (_role_profile(r) for r in _PROFILE_ROLES)
+    wanted = [(horiz_path, "smart-cut" if smart_master else "null", master, "Horizontal")]
+    if vert_path:
+        crop = _vertical_crop(clip, crop_path)
+        wanted.append((vert_path, f"{crop},scale=1080:1920{subs}", vertical, "Vertical"))
+    if telegram_dir:
+        os.makedirs(telegram_dir, exist_ok=True)
+        wanted.append((os.path.join(telegram_dir, os.path.basename(horiz_path)),
+                       tg_scale, telegram, None))
+        if vert_path:
+            crop = _vertical_crop(clip, crop_path, tag="tg")  # own instance for its sendcmd
+            wanted.append((os.path.join(telegram_dir, os.path.basename(vert_path)),
+                           f"{crop},scale=-2:720{subs}", telegram, None))
+
+    renditions = []
+    for path, vf, profile, label in wanted:
+        if cache is None:
+            if os.path.exists(path):
+                if label:
+                    print(f"    {label} already exists, skipping")
+                continue
+            key = None
+        else:
+            key = _cache_key(cache, clip, vf, profile)
+            if _cache_fetch(cache, key, path):
+                if label:
+                    print(f"    {label} reused from render cache")
+                continue
+            if os.path.exists(path):
+                # Stale output, possibly a hardlink into the cache — unlink it
+                # so ffmpeg doesn't overwrite the cached file in place
+                os.remove(path)
+        # The smart-cut master is built outside the graph; render it normally if that fails
+        renditions.append((path, "null" if vf == "smart-cut" else vf, profile, key))
+    return renditions
+
+
+def _filter_path(path):
+    """Escape a path for a quoted filter option value (option-level ':' and '\\')."""
+    return path.replace("\\", "/").replace(":", "\\:")
+
+
+_JOIN_FADE = 0.01  # seconds of audio fade at each jump-cut join (no clicks)
+
+
+def _rendition_graph(tag, video_in, audio_in, segments, renditions, threads=None,
+                     audio_filter=None):
+    """Build the filter graph + output args fanning trimmed ranges out to renditions.
+
+    segments is [(trim start, duration), ...] relative to the input; one
+    segment is a plain cut, several are trimmed separately and joined by a
+    concat filter (jump cuts) before the fan-out.
+    video_in/audio_in are graph pad labels (audio_in None if the source has
+    no audio). tag keeps pad names unique when several clips share a graph.
+    threads is the encoder thread budget for this range, split across its
+    renditions (None lets the encoder pick — i.e. all cores). audio_filter
+    is applied to the joined audio before the fan-out.
+    Returns (list of filter chains, list of ffmpeg output args).
+    """
+    n = len(renditions)
+    per_output = max(1, threads // n) if threads else None
+    fan_v = f"split={n}" + "".join(f"[{tag}s{i}]" for i in range(n))
+    fan_a = (f"{audio_filter}," if audio_filter else "") \
+        + f"asplit={n}" + "".join(f"[{tag}a{i}]" for i in range(n))
+
+    if len(segments) == 1:
+        (trim_start, duration), = segments
+        graph = [f"{video_in}trim=start={trim_start}:duration={duration},setpts=PTS-STARTPTS,"
+                 + fan_v]
+        if audio_in:
+            graph.append(f"{audio_in}atrim=start={trim_start}:duration={duration},"
+                         f"asetpts=PTS-STARTPTS," + fan_a)
     else:
-        print(f"    Horizontal already exists, skipping")
+        k = len(segments)
+        graph = [f"{video_in}split={k}" + "".join(f"[{tag}j{j}]" for j in range(k))]
+        if audio_in:
+            graph.append(f"{audio_in}asplit={k}" + "".join(f"[{tag}ja{j}]" for j in range(k)))
+        joined = ""
+        for j, (trim_start, duration) in enumerate(segments):
+            graph.append(f"[{tag}j{j}]trim=start={trim_start}:duration={duration},"
+                         f"setpts=PTS-STARTPTS[{tag}k{j}]")
+            joined += f"[{tag}k{j}]"
+            if audio_in:
+                fade_out = max(0.0, duration - _JOIN_FADE)
+                graph.append(f"[{tag}ja{j}]atrim=start={trim_start}:duration={duration},"
+                             f"asetpts=PTS-STARTPTS,afade=t=in:d={_JOIN_FADE},"
+                             f"afade=t=out:st={fade_out:.3f}:d={_JOIN_FADE}[{tag}ka{j}]")
+                joined += f"[{tag}ka{j}]"
+        if audio_in:
+            graph.append(f"{joined}concat=n={k}:v=1:a=1[{tag}cv][{tag}ca]")
+            graph.append(f"[{tag}ca]" + fan_a)
+        else:
+            graph.append(f"{joined}concat=n={k}:v=1:a=0[{tag}cv]")
+        graph.append(f"[{tag}cv]" + fan_v)
+
+    for i, (_, vf, _, _) in enumerate(renditions):
+        graph.append(f"[{tag}s{i}]{vf}[{tag}v{i}]")
+
+    out_args = []
+    for i, (path, _, profile, _) in enumerate(renditions):
+        out_args += ["-map", f"[{tag}v{i}]"]
+        if audio_in:
+            out_args += ["-map", f"[{tag}a{i}]"]
+        out_args += _encode_args(profile, per_output) + ["-y", path]
+    return graph, out_args
+
+
+def _remove_partial(renditions):
+    """Delete outputs of a failed ffmpeg run — they'd be mistaken for finished cuts."""
+    for path, _, _, _ in renditions:
+        if os.path.exists(path):
+            os.remove(path)
 
-    if skip_vertical:
-        return horiz_path, None
 
-    # Vertical 9:16 cut (center crop)
-    if not os.path.exists(vert_path):
-        # Allow per-clip crop_x override
-        crop_x = clip.get("crop_x")
-        if crop_x is not None:
-            crop_filter = f"crop=ih*9/16:ih:{crop_x}:0,scale=1080:1920"
+def _store_rendered(cache, renditions):
+    """Add freshly rendered outputs to the render cache."""
+    if cache is None:
+        return
+    for path, _, _, key in renditions:
+        if os.path.exists(path):
+            _cache_store(cache, key, path)
+
+
+def _auto_crop_path(work_dir, state, video_path, mode):
+    """Crop path for vertical cuts (see _vertical_crop), or None for a static crop.
+
+    mode "reframe" follows the source's reframing track; mode "speaker"
+    cuts to the diarized speaker's position at utterance boundaries.
+    """
+    if not mode:
+        return None
+    source = _probe_video(video_path)
+    if not source["width"] or not source["height"]:
+        return None
+    track = load_reframe_track(work_dir, video_path, source["width"], source["height"])
+    if not track:
+        return None
+    if mode == "speaker":
+        utterances = _load_utterances(work_dir, state)
+        if not utterances:
+            print("  No utterance timeline — falling back to the reframing track")
         else:
-            crop_filter = "crop=ih*9/16:ih:(iw-ih*9/16)/2:0,scale=1080:1920"
+            positions = load_speaker_positions(work_dir, video_path, track, utterances)
+            return functools.partial(speaker_crop_moves, utterances, positions,
+                                     src_width=source["width"], src_height=source["height"])
+    return functools.partial(crop_moves, track, src_width=source["width"],
+                             src_height=source["height"])
 
-        cmd_v = [
-            "ffmpeg",
-            "-ss", str(pre_seek),
-            "-i", video_path,
-            "-ss", str(fine_seek),
-            "-t", str(duration),
-            "-vf", crop_filter,
-            "-c:v", "libx264", "-c:a", "aac",
-            "-crf", "23",
-            "-avoid_negative_ts", "make_zero",
-            "-y", vert_path,
-        ]
-        result = subprocess.run(cmd_v, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"    ERROR (vertical): {result.stderr[-300:]}")
+
+def _caption_track(work_dir, state, enabled):
+    """Caption writer for vertical cuts (clip -> ASS path or None), or None.
+
+    ASS files are named by content hash, so the vertical filter chain — and
+    with it the render cache key — changes whenever the captions do.
+    """
+    if not enabled:
+        return None
+    words = load_words(state.get("words_path"))
+    if words is None:
+        print("  No word timings (transcribed before they were kept) — captions skipped")
+        return None
+    caption_dir = os.path.join(work_dir, "captions")
+
+    def _write(clip):
+        start, end = clip["start_time"], clip["end_time"]
+        clip_words = word_list(words, *word_range(words, start, end))
+        if clip.get("keep"):
+            # Jump cut: drop words that were cut out, move the rest onto the output timeline
+            clip_words = [
+                dict(w, start=_output_time(clip, w["start"]), end=_output_time(clip, w["end"]))
+                for w in clip_words
+                if any(s <= (w["start"] + w["end"]) / 2 < e for s, e in clip["keep"])
+            ]
+            start, end = 0.0, _output_time(clip, end)
+        ass = build_ass(clip_words, start, end)
+        if not ass:
+            return None
+        digest = hashlib.sha256(ass.encode()).hexdigest()[:12]
+        path = os.path.join(caption_dir, f"clip_{clip['id']:02d}_{digest}.ass")
+        if not os.path.exists(path):
+            os.makedirs(caption_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(ass)
+        return path
+
+    return _write
+
+
+_SCENE_SNAP_TOL = 0.25  # seconds a boundary may move onto a scene cut
+
+
+def _scene_snap(work_dir, video_path, tolerance):
+    """Boundary snapper for _cut_clip from the source's scene-cut index, or None."""
+    if not tolerance:
+        return None
+    source = _probe_video(video_path)
+    if not source["width"] or not source["height"] or not source["fps"]:
+        return None
+    cuts = load_scene_index(work_dir, video_path, source["fps"],
+                            source["width"], source["height"])
+    if not cuts:
+        return None
+    return functools.partial(snap_to_scene, cuts=cuts, tolerance=tolerance)
+
+
+def _snap_clip(clip, snap):
+    """Copy of clip with start/end moved onto nearby scene cuts (see _scene_snap).
+
+    A start just before a camera switch, or an end just after one, would
+    otherwise leave a frame or two of the other shot at the edge.
+    """
+    if snap is None:
+        return clip
+    start, end = snap(clip["start_time"]), snap(clip["end_time"])
+    if end - start < 1.0 or (start, end) == (clip["start_time"], clip["end_time"]):
+        return clip
+    print(f"    Clip #{clip['id']}: snapped to scene cuts "
+          f"({start - clip['start_time']:+.2f}s / {end - clip['end_time']:+.2f}s)")
+    return dict(clip, start_time=start, end_time=end)
+
+
+def _jump_cutter(state, enabled):
+    """Jump-cut planner for _cut_clip (clip -> copy with "keep" ranges), or None."""
+    if not enabled:
+        return None
+    words = load_words(state.get("words_path"))
+    if words is None:
+        print("  No word timings (transcribed before they were kept) — jump cuts skipped")
+        return None
+    if state.get("disfluencies") is False:
+        print("  Transcribed without --jump-cut — no filler words, only pauses are cut")
+
+    def _plan(clip):
+        keep = jump_cut_keep(words, clip["start_time"], clip["end_time"])
+        if len(keep) < 2:
+            return clip
+        removed = (clip["end_time"] - clip["start_time"]) - sum(e - s for s, e in keep)
+        print(f"    Clip #{clip['id']}: jump cut removes {removed:.1f}s in {len(keep) - 1} cuts")
+        return dict(clip, keep=keep)
+
+    return _plan
+
+
+def _prepare_clip(clip, snap=None, jump_cut=None, level=None):
+    """Apply the optional boundary snap, jump-cut plan and loudness gain to a clip."""
+    clip = _snap_clip(clip, snap)
+    if jump_cut is not None:
+        clip = jump_cut(clip)
+    return level(clip) if level is not None else clip
+
+
+def _clip_segments(clip, offset):
+    """[(trim start, duration), ...] of a clip relative to an input seeked to offset."""
+    keep = clip.get("keep") or [[clip["start_time"], clip["end_time"]]]
+    return [(round(s - offset, 3), round(e - s, 3)) for s, e in keep]
+
+
+def _output_time(clip, t):
+    """Where source time t lands in the rendered clip (accounts for jump cuts)."""
+    keep = clip.get("keep") or [[clip["start_time"], clip["end_time"]]]
+    out = 0.0
+    for s, e in keep:
+        if t < s:
+            break
+        if t < e:
+            return round(out + t - s, 3)
+        out += e - s
+    return round(out, 3)
+
+
+_LOUDNESS_TARGET = -14.0  # LUFS — what TikTok / Reels / Shorts normalise towards
+_MAX_GAIN = 15.0  # dB either way — beyond this the measurement is suspect
+_PEAK_LIMIT = 0.891  # -1 dBFS ceiling after the gain
+
+
+def _loudness_leveler(work_dir, state, target):
+    """Loudness planner for _cut_clip (clip -> copy with "gain_db"), or None.
+
+    Gains come from the source's cached momentary loudness windows (see
+    load_loudness_windows) over exactly the ranges the clip keeps, so each
+    clip is levelled inside its single encode without measuring it again.
+    """
+    if target is None:
+        return None
+    loudness = load_loudness_windows(work_dir, state["video_path"], state.get("audio_path"))
+    if loudness is None:
+        print("  No audio loudness readings — normalization skipped")
+        return None
+
+    def _level(clip):
+        measured = range_loudness(
+            loudness, clip.get("keep") or [[clip["start_time"], clip["end_time"]]]
+        )
+        if measured is None:
+            return clip
+        gain = round(min(max(target - measured, -_MAX_GAIN), _MAX_GAIN), 1)
+        print(f"    Clip #{clip['id']}: {measured:.1f} LUFS → gain {gain:+.1f} dB")
+        return dict(clip, gain_db=gain) if gain else clip
+
+    return _level
+
+
+def _audio_filter(clip):
+    """Audio filter chain for a clip's planned gain (None when there's none)."""
+    gain = clip.get("gain_db")
+    if not gain:
+        return None
+    return f"volume={gain:+.1f}dB,alimiter=limit={_PEAK_LIMIT}:level=0"
+
+
+def _cut_clip(video_path, clip, output_dir, skip_vertical=False, telegram_dir=None,
+              smart_cut=False, keyframes=None, threads=None, cache=None, on_progress=None,
+              crop_path=None, snap=None, captions=None, jump_cut=None, level=None):
+    """Cut a single clip — horizontal and optionally vertical versions.
+
+    All renditions (see _pending_renditions) come out of ONE ffmpeg process:
+    the source is seeked and decoded once, then a split filter graph fans
+    out into every output that isn't already done (or in the render cache).
+
+    With smart_cut, the master is built by _smart_cut instead (stream copy
+    between keyframes) and only the re-encoded renditions go through the graph.
+
+    Uses two-stage seeking for frame-accurate cuts:
+    - Input -ss jumps straight to the keyframe preceding start (from the
+      source's keyframe index, or 2 seconds early without one)
+    - trim/atrim inside the graph refines from that point (accurate)
+
+    threads caps the encoder threads of this job (see _plan_workers).
+    on_progress receives live ffmpeg stats for the render (see _run_ffmpeg).
+    crop_path steers the vertical crop (see _vertical_crop).
+    snap moves the boundaries onto nearby scene cuts (see _snap_clip).
+    captions burns subtitles into the vertical renditions (see _caption_track).
+    jump_cut cuts fillers and long pauses out of the clip (see _jump_cutter).
+    level sets the clip's loudness gain (see _loudness_leveler).
+    """
+    clip = _prepare_clip(clip, snap, jump_cut, level)
+    start = clip["start_time"]
+    end = clip["end_time"]
+    smart_cut = smart_cut and not clip.get("keep")
+
+    # Seek to the preceding keyframe, then refine
+    pre_seek = _seek_point(keyframes, start)
+    segments = _clip_segments(clip, pre_seek)
+    duration = sum(d for _, d in segments)
+
+    horiz_path, vert_path = _clip_paths(clip, output_dir, skip_vertical)
+
+    source = _probe_video(video_path)
+
+    renditions = _pending_renditions(clip, horiz_path, vert_path, source, telegram_dir, cache,
+                                     smart_master=smart_cut, crop_path=crop_path,
+                                     captions=captions)
+    if smart_cut and renditions and renditions[0][0] == horiz_path:
+        if _smart_cut(video_path, start, end, horiz_path, keyframes, threads,
+                      _audio_filter(clip)):
+            _store_rendered(cache, renditions[:1])
+            renditions = renditions[1:]
+    if not renditions:
+        return horiz_path, vert_path
+
+    graph, out_args = _rendition_graph(
+        "", "[0:v]", "[0:a]" if source["has_audio"] else None,
+        segments, renditions, threads, _audio_filter(clip),
+    )
+    cmd = [
+        "ffmpeg",
+        "-ss", str(pre_seek),
+        "-i", video_path,
+        "-filter_complex", ";".join(graph),
+    ] + out_args
+
+    result = _run_ffmpeg(cmd, on_progress, duration)
+    if result.returncode != 0:
+        print(f"    ERROR (cut): {result.stderr[-300:]}")
+        _remove_partial(renditions)
+        if os.path.exists(horiz_path):
             return horiz_path, None
-    else:
-        print(f"    Vertical already exists, skipping")
+        return None, None
 
+    _store_rendered(cache, renditions)
     return horiz_path, vert_path
 
 
-def _make_telegram_copy(clip_path, tg_dir):
+def _cut_clips_sequential(video_path, clips, output_dir, skip_vertical=False,
+                          telegram_dir=None, keyframes=None, cache=None, on_progress=None,
+                          crop_path=None, snap=None, captions=None, jump_cut=None,
+                          level=None):
+    """Cut every clip from ONE sequential pass over the source.
+
+    Clips are sorted by start_time and a single ffmpeg decodes from the
+    keyframe before the first clip to the end of the last one; each clip is
+    a trim/atrim branch of the shared decode feeding its own renditions. The
+    source is read front to back exactly once — no per-clip opens or random
+    seeks, which is what hurts on network storage.
+
+    Returns a list of (clip, horizontal path, vertical path) in start order.
+    Paths are None for clips whose cut failed. on_progress receives live
+    stats for the whole pass — a 1 fps thumbnail branch of the decode goes
+    to a null output so ffmpeg's out_time follows the read position (the
+    clip outputs' timestamps restart at 0 per clip). snap, captions,
+    jump_cut and level apply per clip as in _cut_clip.
+    """
+    clips = sorted((_prepare_clip(c, snap, jump_cut, level) for c in clips),
+                   key=lambda c: c["start_time"])
+    source = _probe_video(video_path)
+
+    pre_seek = _seek_point(keyframes, clips[0]["start_time"])
+    span = max(c["end_time"] for c in clips) - pre_seek
+
+    pending = []  # (clip, horiz, vert, renditions) for clips with work to do
+    results = []
+    for clip in clips:
+        horiz_path, vert_path = _clip_paths(clip, output_dir, skip_vertical)
+        renditions = _pending_renditions(clip, horiz_path, vert_path, source, telegram_dir, cache,
+                                         crop_path=crop_path, captions=captions)
+        if renditions:
+            pending.append((clip, horiz_path, vert_path, renditions))
+        results.append((clip, horiz_path, vert_path))
+
+    if not pending:
+        return results
+
+    n = len(pending)
+    graph = [f"[0:v]split={n + 1}" + "".join(f"[c{i}v]" for i in range(n)) + "[pos]",
+             "[pos]fps=1,scale=16:16[posv]"]
+    if source["has_audio"]:
+        graph.append(f"[0:a]asplit={n}" + "".join(f"[c{i}a]" for i in range(n)))
+    out_args = ["-map", "[posv]", "-f", "null", "-"]  # decode position, for progress
+    # Every encoder lives for the whole pass — split the cores between all of them
+    per_encoder = max(1, (os.cpu_count() or 4) // sum(len(p[3]) for p in pending))
+    for i, (clip, _, _, renditions) in enumerate(pending):
+        clip_graph, clip_args = _rendition_graph(
+            f"c{i}", f"[c{i}v]", f"[c{i}a]" if source["has_audio"] else None,
+            _clip_segments(clip, pre_seek), renditions, threads=per_encoder * len(renditions),
+            audio_filter=_audio_filter(clip),
+        )
+        graph += clip_graph
+        out_args += clip_args
+
+    cmd = [
+        "ffmpeg",
+        "-ss", str(pre_seek),
+        "-t", str(span),
+        "-i", video_path,
+        "-filter_complex", ";".join(graph),
+    ] + out_args
+
+    print(f"  Sequential pass: {_format_time(pre_seek)}–{_format_time(pre_seek + span)} "
+          f"→ {sum(len(p[3]) for p in pending)} outputs")
+    result = _run_ffmpeg(cmd, on_progress, span)
+    if result.returncode != 0:
+        print(f"    ERROR (sequential cut): {result.stderr[-300:]}")
+        for _, _, _, renditions in pending:
+            _remove_partial(renditions)
+        failed = {clip["id"] for clip, _, _, _ in pending}
+        results = [
+            (clip, h if os.path.exists(h) else None, None) if clip["id"] in failed else (clip, h, v)
+            for clip, h, v in results
+        ]
+    else:
+        for _, _, _, renditions in pending:
+            _store_rendered(cache, renditions)
+
+    return results
+
+
+def _make_telegram_copy(clip_path, tg_dir, background=False):
     """Create a 720p downscaled copy of a clip for Telegram.
 
-    If the source is already 720p or smaller, copies at CRF 23 without scaling.
+    Fallback for clips whose master was cut before the Telegram copy was
+    requested — normally _cut_clip renders it in the same pass.
+    If the source is already 720p or smaller, re-encodes without scaling.
+    Encoded with the telegram role's profile.
+    With background=True ffmpeg runs niced and single-threaded so it never
+    competes with master renders.
     Returns the path to the Telegram-ready file.
     """
     os.makedirs(tg_dir, exist_ok=True)
@@ -468,35 +2331,26 @@ def _make_telegram_copy(clip_path, tg_dir):
     if os.path.exists(out_path):
         return out_path
 
-    # Probe source height
-    probe = subprocess.run(
-        ["ffprobe", "-v", "error", "-select_streams", "v:0",
-         "-show_entries", "stream=height", "-of", "csv=p=0", clip_path],
-        capture_output=True, text=True,
-    )
-    try:
-        src_height = int(probe.stdout.strip())
-    except (ValueError, AttributeError):
-        src_height = 9999  # Assume large if probe fails
+    src_height = _probe_video(clip_path)["height"] or 9999  # Assume large if probe fails
 
     vf = "scale=-2:720" if src_height > 720 else None
 
     cmd = ["ffmpeg", "-i", clip_path]
     if vf:
         cmd += ["-vf", vf]
-    cmd += [
-        "-c:v", "libx264", "-c:a", "aac",
-        "-crf", "23",
-        "-y", out_path,
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    threads = 1 if background else None
+    cmd += _encode_args(_role_profile("telegram"), threads)
+    cmd += ["-y", out_path]
+    result = _run_ffmpeg(cmd, niceness=_BACKGROUND_NICE if background else 0)
     if result.returncode != 0:
         print(f"    [Telegram copy] ERROR: {result.stderr[-200:]}")
         return clip_path  # Fall back to full-res file
     return out_path
 
 
-def step_cut_draft(work_dir, state, skip_vertical=False):
+def step_cut_draft(work_dir, state, skip_vertical=False, smart_cut=False,
+                   cache_gb=_RENDER_CACHE_GB, reframe=None, snap_scenes=None,
+                   captions=False, snap_words=True, jump_cut=False, loudness=None):
     """Cut ONLY the top-scoring clip as a draft for review."""
     print("\n=== Step 4a: Draft Cut (top clip only) ===")
 
@@ -505,12 +2359,14 @@ def step_cut_draft(work_dir, state, skip_vertical=False):
     if not clips:
         print("  No clips found in clips.json")
         return state
+    if snap_words:
+        clips = _align_clips_to_words(state, clips, clips_path)
 
     # Sort by virality_score descending, take #1
     clips_sorted = sorted(clips, key=lambda c: c.get("virality_score", 0), reverse=True)
     top_clip = clips_sorted[0]
 
-    video_path = state["video_path"]
+    video_path = _cut_source(state)
     output_dir = os.path.join(work_dir, "clips")
 
     title = top_clip.get("title", "Untitled")
@@ -522,7 +2378,18 @@ def step_cut_draft(work_dir, state, skip_vertical=False):
                 f"Time: {time_range}\n"
                 f"Score: {top_clip.get('virality_score', '?')}/10")
 
-    h_path, v_path = _cut_clip(video_path, top_clip, output_dir, skip_vertical=skip_vertical)
+    keyframes = _load_keyframe_index(work_dir, video_path)
+    cache = _open_render_cache(video_path, cache_gb)
+    crop_path = None if skip_vertical else _auto_crop_path(work_dir, state, video_path, reframe)
+    snap = _scene_snap(work_dir, video_path, snap_scenes)
+    caption_track = None if skip_vertical else _caption_track(work_dir, state, captions)
+    jumper = _jump_cutter(state, jump_cut)
+    leveler = _loudness_leveler(work_dir, state, loudness)
+    h_path, v_path = _cut_clip(video_path, top_clip, output_dir, skip_vertical=skip_vertical,
+                               smart_cut=smart_cut, keyframes=keyframes, cache=cache,
+                               crop_path=crop_path, snap=snap, captions=caption_track,
+                               jump_cut=jumper, level=leveler)
+    _cache_evict(cache)
 
     if h_path:
         print(f"\n  Draft ready for review:")
@@ -542,11 +2409,33 @@ def step_cut_draft(work_dir, state, skip_vertical=False):
     return state
 
 
-def step_cut_all(work_dir, state, skip_vertical=False, max_workers=4):
-    """Cut all clips in parallel using ThreadPoolExecutor.
-
-    ffmpeg processes run concurrently (max_workers at a time).
-    Telegram sends happen in a background thread so they don't block cutting.
+def step_cut_all(work_dir, state, skip_vertical=False, max_workers="auto", smart_cut=False,
+                 engine="parallel", cache_gb=_RENDER_CACHE_GB, reframe=None,
+                 snap_scenes=None, captions=False, snap_words=True, jump_cut=False,
+                 loudness=None):
+    """Cut all clips with one of two engines.
+
+    parallel:   one ffmpeg per clip via ThreadPoolExecutor. max_workers (int
+                or "auto") and each job's -threads budget come from
+                _plan_workers so the pool matches the core count. Clips are
+                submitted longest-first by _clip_cost so a big clip never
+                ends up as the batch's tail.
+    sequential: one ffmpeg reads the source front to back and emits every
+                clip as the playhead passes (see _cut_clips_sequential).
+    Telegram sends (and any fallback 720p transcodes, at low priority)
+    happen in a background thread so they don't block cutting.
+
+    Renditions go through the render cache (cache_gb quota, 0 disables it),
+    so a re-run only renders clips whose spec actually changed.
+    reframe ("reframe" / "speaker") makes vertical crops without a crop_x
+    follow the source's reframing track or the active speaker.
+    snap_scenes (seconds) moves clip boundaries onto scene cuts within
+    that distance (see _snap_clip). captions burns word-timed subtitles
+    into the vertical renditions. snap_words first aligns clip times to the
+    word timings and saves them (see _align_clips_to_words). jump_cut
+    removes fillers and long pauses inside each clip (see _jump_cutter).
+    loudness (target LUFS) levels every clip from the source's one-time
+    loudness measurement (see _loudness_leveler).
     """
     print("\n=== Step 4b: Cut All Clips ===")
 
@@ -555,18 +2444,36 @@ def step_cut_all(work_dir, state, skip_vertical=False, max_workers=4):
     if not clips:
         print("  No clips found.")
         return state
+    if snap_words:
+        clips = _align_clips_to_words(state, clips, clips_path)
 
-    video_path = state["video_path"]
+    video_path = _cut_source(state)
     output_dir = os.path.join(work_dir, "clips")
+    tg_dir = os.path.join(output_dir, "telegram")
     total = len(clips)
 
     # Send clips.json to Telegram
     send_document(clips_path, caption=f"Clip definitions — {video_name}")
     send_clips_summary(clips, video_name)
 
+    # Longest job first — the biggest clips must not be the last ones started
+    source = _probe_video(video_path)
+    costs = {clip["id"]: _clip_cost(clip, source, skip_vertical) for clip in clips}
+    clips = sorted(clips, key=lambda c: costs[c["id"]], reverse=True)
+
     mode = "horizontal only" if skip_vertical else "horizontal + vertical"
+    if engine == "sequential":
+        how = f"in one sequential pass ({mode})"
+        estimate = _estimate_makespan([sum(costs.values())], 1, os.cpu_count() or 4)
+        if smart_cut:
+            print("  Note: --smart-cut is ignored by the sequential engine")
+    else:
+        max_workers, threads = _plan_workers(max_workers, total)
+        how = f"in parallel ({mode}, {max_workers} workers × {threads} threads)"
+        estimate = _estimate_makespan(costs.values(), max_workers, threads)
+    print(f"  Cutting {total} clips {how}, estimated ~{_format_time(estimate)}")
     notify_step("cutting_start", video_name,
-                f"Cutting {total} clips in parallel ({mode}, {max_workers} workers)...")
+                f"Cutting {total} clips {how}...\nEstimated time: ~{_format_time(estimate)}")
 
     # ── Background Telegram sender (non-blocking) ──
     tg_queue = queue_mod.Queue()
@@ -579,59 +2486,132 @@ def step_cut_all(work_dir, state, skip_vertical=False, max_workers=4):
             except queue_mod.Empty:
                 continue
             path, caption = item
-            send_video(path, caption=caption)
+            # 720p copy for Telegram, keep full-res for Drive
+            send_video(_make_telegram_copy(path, tg_dir, background=True), caption=caption)
             tg_queue.task_done()
 
     tg_thread = threading.Thread(target=_telegram_sender, daemon=True)
     tg_thread.start()
 
-    # ── Parallel ffmpeg cuts ──
+    # ── ffmpeg cuts ──
     cut_count = 0
     errors = []
 
-    tg_dir = os.path.join(output_dir, "telegram")
-
-    def _cut_one(clip_idx, clip):
-        """Wrapper for ThreadPoolExecutor — returns (idx, clip, h, v)."""
-        h, v = _cut_clip(video_path, clip, output_dir, skip_vertical=skip_vertical)
-        return clip_idx, clip, h, v
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(_cut_one, i, clip): i
-            for i, clip in enumerate(clips, 1)
-        }
-        for future in as_completed(futures):
-            i, clip, h_path, v_path = future.result()
-            title = clip.get("title", f"Clip {clip['id']}")
-            start_fmt = _format_time(clip["start_time"])
-            end_fmt = _format_time(clip["end_time"])
-            duration = clip["end_time"] - clip["start_time"]
-
-            if h_path:
-                cut_count += 1
-                print(f"  Done {cut_count}/{total}: #{clip['id']} {title} ({start_fmt}–{end_fmt})")
-                caption = (
-                    f"<b>Clip {cut_count}/{total}</b>\n"
-                    f"#{clip['id']} {title}\n"
-                    f"{start_fmt}–{end_fmt} ({duration:.0f}s) | "
-                    f"{clip.get('virality_score', '?')}/10"
-                )
-                # Send 720p copy to Telegram, keep full-res for Drive
-                tg_path = _make_telegram_copy(h_path, tg_dir)
-                tg_queue.put((tg_path, caption))
-                if v_path:
-                    tg_v = _make_telegram_copy(v_path, tg_dir)
-                    tg_queue.put((tg_v, f"{caption}\n(vertical 9:16)"))
-            else:
-                errors.append(clip["id"])
-                print(f"  FAILED: #{clip['id']} {title}")
+    keyframes = _load_keyframe_index(work_dir, video_path)
+    cache = _open_render_cache(video_path, cache_gb)
+    crop_path = None if skip_vertical else _auto_crop_path(work_dir, state, video_path, reframe)
+    snap = _scene_snap(work_dir, video_path, snap_scenes)
+    caption_track = None if skip_vertical else _caption_track(work_dir, state, captions)
+    jumper = _jump_cutter(state, jump_cut)
+    leveler = _loudness_leveler(work_dir, state, loudness)
+
+    # ── Live progress: latest ffmpeg stats per job, one batch line every few seconds ──
+    live = {}
+    live_lock = threading.Lock()
+    last_report = [0.0]
+
+    def _progress(job, stats):
+        with live_lock:
+            live[job] = stats
+            now = time.time()
+            if now - last_report[0] < _PROGRESS_INTERVAL and not stats["done"]:
+                return
+            last_report[0] = now
+            done_sec = sum(min(st["out_time"], st["duration"]) for st in live.values())
+            total_sec = sum(st["duration"] for st in live.values())
+            active = [
+                f"#{j} {st['speed'] or 0:.1f}x {st['fps'] or 0:.0f}fps"
+                for j, st in live.items() if not st["done"] and st["out_time"] > 0
+            ]
+        pct = 100.0 * done_sec / total_sec if total_sec else 0.0
+        print(f"  [progress] {pct:3.0f}% of {_format_time(total_sec)} rendered"
+              + (f" | {', '.join(active)}" if active else ""))
+
+    if engine == "sequential":
+        # Placeholder until the pass reports its decode position over the real span
+        span = max(c["end_time"] for c in clips) - min(c["start_time"] for c in clips)
+        live["pass"] = _parse_progress({}, span)
+    else:
+        for clip in clips:
+            live[clip["id"]] = _parse_progress({}, clip["end_time"] - clip["start_time"])
+    encode_stats = state.setdefault("encode_stats", {})
+
+    def _on_cut(clip, h_path, v_path):
+        """Report a finished clip, record its encode speed and queue its Telegram copies."""
+        nonlocal cut_count
+        title = clip.get("title", f"Clip {clip['id']}")
+        start_fmt = _format_time(clip["start_time"])
+        end_fmt = _format_time(clip["end_time"])
+        duration = sum(d for _, d in _clip_segments(clip, 0))
+        stats = live.get(clip["id"], live.get("pass"))
+        if engine != "sequential":
+            # Cached or failed clips never report progress — count them as finished
+            with live_lock:
+                live[clip["id"]] = dict(stats, out_time=duration, done=True)
+
+        if h_path:
+            cut_count += 1
+            speed = ""
+            if stats and stats["done"] and stats["speed"]:
+                speed = f" @ {stats['speed']:.1f}x"
+                encode_stats[str(clip["id"])] = {
+                    "speed": stats["speed"], "fps": stats["fps"], "duration": round(duration, 2),
+                    "engine": engine, "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+            print(f"  Done {cut_count}/{total}: #{clip['id']} {title} ({start_fmt}–{end_fmt}){speed}")
+            caption = (
+                f"<b>Clip {cut_count}/{total}</b>\n"
+                f"#{clip['id']} {title}\n"
+                f"{start_fmt}–{end_fmt} ({duration:.0f}s) | "
+                f"{clip.get('virality_score', '?')}/10"
+            )
+            tg_queue.put((h_path, caption))
+            if v_path:
+                tg_queue.put((v_path, f"{caption}\n(vertical 9:16)"))
+        else:
+            errors.append(clip["id"])
+            print(f"  FAILED: #{clip['id']} {title}")
+
+    if engine == "sequential":
+        for clip, h_path, v_path in _cut_clips_sequential(
+                video_path, clips, output_dir, skip_vertical=skip_vertical,
+                telegram_dir=tg_dir, keyframes=keyframes, cache=cache,
+                on_progress=lambda st: _progress("pass", st), crop_path=crop_path,
+                snap=snap, captions=caption_track, jump_cut=jumper, level=leveler):
+            _on_cut(clip, h_path, v_path)
+    else:
+        def _cut_one(clip_idx, clip):
+            """Wrapper for ThreadPoolExecutor — returns (idx, clip, h, v)."""
+            clip = _prepare_clip(clip, snap, jumper, leveler)  # here so reports show the real times
+            h, v = _cut_clip(video_path, clip, output_dir, skip_vertical=skip_vertical,
+                             telegram_dir=tg_dir, smart_cut=smart_cut, keyframes=keyframes,
+                             threads=threads, cache=cache,
+                             on_progress=lambda st: _progress(clip["id"], st),
+                             crop_path=crop_path, captions=caption_track)
+            return clip_idx, clip, h, v
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_cut_one, i, clip): i
+                for i, clip in enumerate(clips, 1)
+            }
+            for future in as_completed(futures):
+                _, clip, h_path, v_path = future.result()
+                _on_cut(clip, h_path, v_path)
 
     # Wait for all Telegram sends to finish
     tg_queue.join()
     tg_done.set()
     tg_thread.join(timeout=5)
 
+    if cache is not None:
+        clip_bases = {
+            os.path.splitext(os.path.basename(_clip_paths(clip, output_dir)[0]))[0]
+            for clip in clips
+        }
+        _prune_stale_outputs(output_dir, tg_dir, clip_bases)
+    _cache_evict(cache)
+
     print(f"\n  Cut {cut_count}/{total} clips. Errors: {len(errors)}")
     if errors:
         print(f"  Failed clip IDs: {errors}")
@@ -726,29 +2706,110 @@ def step_upload(work_dir, state):
 
 def main():
     parser = argparse.ArgumentParser(description="Video-to-Clips Pipeline")
-    parser.add_argument("url", nargs="?", help="Google Drive video URL")
+    parser.add_argument("url", nargs="*",
+                        help="Google Drive video URL (several URLs: batch download + "
+                             "transcribe)")
     parser.add_argument("--local", type=str, default=None,
                         help="Path to a local video file (skip Drive download)")
     parser.add_argument("--transcribe-only", action="store_true",
                         help="Download and transcribe only (stop before cutting)")
+    parser.add_argument("--transcribe-chunks", type=int, default=1, metavar="N",
+                        help="Transcribe long recordings as N parallel chunks split at "
+                             "silences (default: 1, one upload)")
+    parser.add_argument("--transcribe-jobs", type=int, default=_TRANSCRIBE_JOBS, metavar="N",
+                        help=f"With several URLs, transcriptions kept in flight at once "
+                             f"(default: {_TRANSCRIBE_JOBS})")
+    parser.add_argument("--stream-audio", action="store_true",
+                        help="Extract the transcription MP3 while the Drive download runs "
+                             "(tees downloaded chunks into ffmpeg)")
     parser.add_argument("--draft", action="store_true",
                         help="Cut only the top-scoring clip as a draft")
+    parser.add_argument("--thumbnails", action="store_true",
+                        help="Send a cover frame + contact sheet per clip to Telegram for "
+                             "review (one pass over the source, nothing rendered)")
     parser.add_argument("--cut-and-upload", action="store_true",
                         help="Cut all clips and upload to Drive")
     parser.add_argument("--cut-only", action="store_true",
                         help="Cut all clips without uploading")
     parser.add_argument("--upload-only", action="store_true",
                         help="Upload already-cut clips to Drive")
+    parser.add_argument("--mezzanine", nargs="?", const="auto", choices=("auto", "force"),
+                        default=None,
+                        help="After ingest, transcode long-GOP / VFR sources once to a "
+                             "seek-friendly CFR mezzanine that all cuts read from "
+                             "('force' builds it regardless)")
     parser.add_argument("--no-vertical", action="store_true",
                         help="Skip vertical 9:16 cuts, keep original aspect ratio only")
-    parser.add_argument("--workers", type=int, default=4,
-                        help="Number of parallel ffmpeg workers (default: 4)")
+    parser.add_argument("--smart-cut", action="store_true",
+                        help="Stream-copy between keyframes, re-encode only the GOP edges "
+                             "of horizontal masters (falls back to full re-encode)")
+    parser.add_argument("--engine", choices=("parallel", "sequential"), default="parallel",
+                        help="Cutting engine: one ffmpeg per clip (parallel, default) or one "
+                             "front-to-back pass over the source for all clips (sequential)")
+    parser.add_argument("--profile", type=_profile_arg, action="append", default=[],
+                        metavar="ROLE=NAME",
+                        help="Encode profile from encode_profiles.json for a rendition role "
+                             "(master, vertical, telegram), e.g. --profile master=archive-x265")
+    parser.add_argument("--list-profiles", action="store_true",
+                        help="List encode profiles and exit")
+    parser.add_argument("--cache-gb", type=float, default=_RENDER_CACHE_GB,
+                        help=f"Render cache size quota in GB, 0 disables it "
+                             f"(default: {_RENDER_CACHE_GB})")
+    reframe_group = parser.add_mutually_exclusive_group()
+    reframe_group.add_argument("--auto-reframe", action="store_const", const="reframe",
+                               dest="reframe",
+                               help="Vertical crops follow faces / on-screen action (analysed "
+                                    "once per source) instead of a static center crop")
+    reframe_group.add_argument("--speaker-crop", action="store_const", const="speaker",
+                               dest="reframe",
+                               help="Vertical crops cut to the active speaker at "
+                                    "utterance boundaries (speaker positions estimated once "
+                                    "per source)")
+    parser.add_argument("--snap-scenes", type=float, nargs="?", const=_SCENE_SNAP_TOL,
+                        default=None, metavar="SECONDS",
+                        help=f"Move clip boundaries onto scene cuts within SECONDS "
+                             f"(default: {_SCENE_SNAP_TOL}) to avoid flash frames")
+    parser.add_argument("--keep-times", action="store_true",
+                        help="Cut clips exactly as timed in the clips JSON (skip snapping "
+                             "boundaries to the word timings)")
+    parser.add_argument("--jump-cut", action="store_true",
+                        help="Cut filler words (um, uh) and pauses over 0.6 s out of each clip "
+                             "(word timings, one encode)")
+    parser.add_argument("--normalize", type=float, nargs="?", const=_LOUDNESS_TARGET,
+                        default=None, metavar="LUFS",
+                        help=f"Level every clip to LUFS (default: {_LOUDNESS_TARGET}) from a "
+                             f"one-time loudness measurement of the source")
+    parser.add_argument("--captions", action="store_true",
+                        help="Burn word-timed captions into vertical clips (same encode)")
+    parser.add_argument("--workers", type=_workers_arg, default="auto",
+                        help="Number of parallel ffmpeg workers, or 'auto' to size from "
+                             "the CPU count (default: auto)")
+    parser.add_argument("--rebuild-transcripts", action="store_true",
+                        help="Regenerate SRT, markdown and word timings of every work dir "
+                             "from the stored transcript payloads (no API calls) and exit")
     parser.add_argument("--dry-run", action="store_true",
                         help="Test OAuth connection only")
     args = parser.parse_args()
 
     _load_env()
 
+    if args.list_profiles:
+        defaults, profiles = _load_profiles()
+        for name, profile in profiles.items():
+            roles = [r for r in _PROFILE_ROLES if defaults.get(r) == name]
+            default_note = f"  [default: {', '.join(roles)}]" if roles else ""
+            print(f"  {name:<18} {profile.get('description', '')}{default_note}")
+        return
+
+    try:
+        _select_profiles(dict(args.profile))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.transcribe_chunks < 1:
+        parser.error("--transcribe-chunks must be at least 1")
+    if args.transcribe_jobs < 1:
+        parser.error("--transcribe-jobs must be at least 1")
+
     if args.dry_run:
         print("=== Dry Run: Testing OAuth ===")
         service = authenticate()
@@ -767,25 +2828,50 @@ def main():
         print("OK" if ok else "FAILED (check VIDEO_CLIPPER_BOT_TOKEN / VIDEO_CLIPPER_CHAT_ID)")
         return
 
+    if args.rebuild_transcripts:
+        rebuild_transcripts()
+        return
+
     if not args.url and not args.local:
         parser.error("URL or --local <path> required (or use --dry-run)")
+    if len(args.url) > 1:
+        if args.local:
+            parser.error("--local takes a single video; pass several URLs for a batch")
+        # Batch: download + transcribe only — clips are identified per video afterwards
+        ok = run_batch(args.url, jobs=args.transcribe_jobs, chunks=args.transcribe_chunks,
+                       stream_audio=args.stream_audio, mezzanine=args.mezzanine,
+                       disfluencies=args.jump_cut)
+        sys.exit(0 if ok else 1)
 
     try:
         # Step 1: Download or ingest local file
         if args.local:
             work_dir, state = step_local_ingest(args.local)
         else:
-            work_dir, state = step_download(args.url)
+            work_dir, state = step_download(args.url[0], stream_audio=args.stream_audio)
+
+        # Step 1b: Seek-friendly mezzanine for long-GOP / VFR sources
+        if args.mezzanine:
+            state = step_mezzanine(work_dir, state, force=args.mezzanine == "force")
 
         # Step 2: Transcribe
         if state.get("step") == "downloaded" or args.transcribe_only:
-            state = step_transcribe(work_dir, state)
+            state = step_transcribe(work_dir, state, chunks=args.transcribe_chunks,
+                                    disfluencies=args.jump_cut)
             if args.transcribe_only:
                 return
 
         # Step 3: Clips must exist (from /clip skill)
+        if args.thumbnails:
+            step_thumbnails(work_dir, state)
+            return
+
         if args.draft:
-            step_cut_draft(work_dir, state, skip_vertical=args.no_vertical)
+            step_cut_draft(work_dir, state, skip_vertical=args.no_vertical,
+                           smart_cut=args.smart_cut, cache_gb=args.cache_gb,
+                           reframe=args.reframe, snap_scenes=args.snap_scenes,
+                           captions=args.captions, snap_words=not args.keep_times,
+                           jump_cut=args.jump_cut, loudness=args.normalize)
             return
 
         if args.upload_only:
@@ -793,7 +2879,12 @@ def main():
             return
 
         if args.cut_and_upload or args.cut_only:
-            state = step_cut_all(work_dir, state, skip_vertical=args.no_vertical, max_workers=args.workers)
+            state = step_cut_all(work_dir, state, skip_vertical=args.no_vertical,
+                                 max_workers=args.workers, smart_cut=args.smart_cut,
+                                 engine=args.engine, cache_gb=args.cache_gb,
+                                 reframe=args.reframe, snap_scenes=args.snap_scenes,
+                                 captions=args.captions, snap_words=not args.keep_times,
+                                 jump_cut=args.jump_cut, loudness=args.normalize)
             if args.cut_and_upload:
                 step_upload(work_dir, state)
             return
@@ -805,7 +2896,12 @@ def main():
 
         # If clips exist, cut and upload
         if state.get("step") in ("clips_identified", "cut"):
-            state = step_cut_all(work_dir, state, skip_vertical=args.no_vertical, max_workers=args.workers)
+            state = step_cut_all(work_dir, state, skip_vertical=args.no_vertical,
+                                 max_workers=args.workers, smart_cut=args.smart_cut,
+                                 engine=args.engine, cache_gb=args.cache_gb,
+                                 reframe=args.reframe, snap_scenes=args.snap_scenes,
+                                 captions=args.captions, snap_words=not args.keep_times,
+                                 jump_cut=args.jump_cut, loudness=args.normalize)
             step_upload(work_dir, state)
 
     except Exception as e: